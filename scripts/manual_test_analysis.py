@@ -5,7 +5,7 @@ Run this to test the automated Claude Code analysis
 """
 from pathlib import Path
 import sys
-sys.path.append(str(Path(__file__).parent))
+sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 from src.analysis.claude_directory_analyzer import ClaudeDirectoryAnalyzer
 
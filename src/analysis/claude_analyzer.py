@@ -5,32 +5,78 @@ No API costs - uses local Claude Code installation for ADHD-optimized analysis
 import subprocess
 import json
 import re
+import struct
 import os
-import tempfile
+import threading
 import time
 import logging
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Callable, TypeVar
 from dataclasses import dataclass, field
 from datetime import datetime, time as time_type, timedelta
 from functools import lru_cache
 from collections import OrderedDict
+from concurrent.futures import Future
+import difflib
 import hashlib
+import math
+import mmap
+import random
 from enum import Enum
 
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar('T')
+
+# orjson is optional; its decode error subclasses json.JSONDecodeError
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
 
 class AnalysisError(Exception):
     """Error during problem analysis"""
     pass
 
 
+class ClaudeTimeoutError(AnalysisError):
+    """Claude CLI did not answer within the timeout"""
+    pass
+
+
 class CircuitBreakerError(Exception):
     """Error when circuit breaker is open"""
     pass
 
 
+_BUSY_MESSAGE = (
+    "Claude AI is busy with other problems right now, but don't worry! "
+    "Try again in a moment, or continue with manual problem entry."
+)
+
+_RECOVERING_MESSAGE = (
+    "Claude AI is temporarily having trouble, but don't worry! "
+    "You can continue learning while it recovers. "
+    "Try manual problem entry or take a short break."
+)
+
+
+@lru_cache(maxsize=16)
+def _format_outage_message(seconds_remaining: int) -> str:
+    """Open-circuit message (memoized; callers pass 10-second buckets)."""
+    return (
+        "Claude AI is temporarily having trouble, but don't worry! "
+        "It's taking a short break to recover. "
+        f"Please try again in {seconds_remaining} seconds, "
+        "or continue with manual problem entry."
+    )
+
+
+def _circuit_noop():
+    """Stands in for the circuit checks when the breaker is disabled"""
+
+
 class CircuitState(Enum):
     """Circuit breaker states"""
     CLOSED = "closed"      # Normal operation
@@ -38,6 +84,13 @@ class CircuitState(Enum):
     HALF_OPEN = "half_open"  # Testing if service has recovered
 
 
+# Persisted breaker state: magic, state index, failure count, trip count,
+# monotonic time of last failure (NaN if none), recovery timeout.
+_STATE_LAYOUT = struct.Struct('=4sBIIdd')
+_STATE_MAGIC = b'FQCB'
+_STATES = tuple(CircuitState)
+
+
 @dataclass
 class HintSet:
     """Three-tier Socratic hint system"""
@@ -170,39 +223,83 @@ class ADHDProfile:
 class ClaudeAnalyzer:
     """Analyzes mathematical problems using Claude Code CLI (FREE with Pro)"""
     
+    # How long a caller waits for a free CLI slot before being turned away
+    BULKHEAD_WAIT_SECONDS = 0.1
+    # How alike two problem texts must be to share an analysis during an outage
+    SIMILAR_PROBLEM_RATIO = 0.9
+    
     def __init__(self, claude_cmd: str = "claude", cache_enabled: bool = True, timeout: int = 120, 
                  max_cache_size: int = 100, cache_ttl_hours: int = 24,
                  circuit_breaker_enabled: bool = True, failure_threshold: int = 3,
                  recovery_timeout: int = 300, half_open_max_calls: int = 2,
-                 max_recovery_timeout: int = 3600):
+                 max_recovery_timeout: int = 3600, backoff_factor: float = 2.0,
+                 timeout_threshold: Optional[int] = None, max_concurrent_calls: int = 4,
+                 state_path: Optional[str] = None, recovery_ramp_calls: int = 10):
         self.claude_cmd = claude_cmd
+        # Built once; every uncached analysis and half-open probe spawns the CLI
+        self._cli_argv = [claude_cmd]
+        self._cli_env = {**os.environ, 'CLAUDE_AUTO_ACCEPT': 'true'}
+        # Bulkhead: cap concurrent CLI processes so a burst can't slow them all
+        self._claude_semaphore = threading.BoundedSemaphore(max_concurrent_calls)
+        # Analyses currently running, by cache key, for concurrent duplicates to share
+        self._inflight: Dict[int, Future] = {}
+        self._inflight_lock = threading.Lock()
         self.cache_enabled = cache_enabled
         self.timeout = timeout
         self.max_cache_size = max_cache_size
         self.cache_ttl = timedelta(hours=cache_ttl_hours)
+        self._cache_ttl_seconds = self.cache_ttl.total_seconds()
         self._cache = OrderedDict()  # LRU cache using OrderedDict
-        self._cache_timestamps = {}  # Track when each entry was created
+        self._cache_timestamps = {}  # time.monotonic() when each entry was created
+        self._cache_texts = {}  # Problem text per entry, for outage near-matches
+        # (key, analysis, monotonic expiry) of the last cache hit or fill, so
+        # back-to-back repeats of one problem skip the LRU bookkeeping
+        self._last_query: Optional[Tuple[int, ProblemAnalysis, float]] = None
         self.max_retries = 3
         
         # Circuit breaker configuration
         self.circuit_breaker_enabled = circuit_breaker_enabled
         self.failure_threshold = failure_threshold
+        # Slow answers are often transient, so it takes a longer run to trip
+        self.timeout_threshold = timeout_threshold or 2 * failure_threshold
         self.recovery_timeout = recovery_timeout  # seconds
         self.half_open_max_calls = half_open_max_calls
+        # Successes needed to close; past the first half_open_max_calls probes,
+        # calls are admitted with a probability that ramps up to 1
+        self.recovery_ramp_calls = max(recovery_ramp_calls, half_open_max_calls)
         self.max_recovery_timeout = max_recovery_timeout
         self.initial_recovery_timeout = recovery_timeout
+        self.backoff_factor = backoff_factor
         
         # Circuit breaker state
         self.circuit_state = CircuitState.CLOSED
         self.failure_count = 0
-        self.last_failure_time: Optional[datetime] = None
+        self.timeout_count = 0  # Consecutive timeouts, counted apart from failures
+        self.last_failure_time: Optional[float] = None  # time.monotonic()
         self.half_open_calls = 0
+        self._recovery_fraction = 0.0  # Share of half-open calls let through
+        self._trip_count = 0  # Consecutive opens since the circuit last closed
+        # Guards state/counter updates so concurrent analyses see one transition
+        self._state_lock = threading.Lock()
         
         # Metrics tracking
         self.total_calls = 0
         self.failed_calls = 0
         self.circuit_opened_count = 0
         
+        # Optional memory-mapped copy of the breaker state, so a restarted
+        # app starts out open instead of re-discovering the outage
+        self._state_map: Optional[mmap.mmap] = None
+        if state_path and circuit_breaker_enabled:
+            self._open_state_map(state_path)
+        
+        if not circuit_breaker_enabled:
+            # Bind no-ops once so each call needn't re-check the flag
+            self._check_circuit_state = _circuit_noop
+            self._record_success = _circuit_noop
+            self._record_failure = _circuit_noop
+            self._record_timeout = _circuit_noop
+        
     def analyze_problem(
         self, 
         problem: Dict[str, Any],
@@ -210,20 +307,53 @@ class ClaudeAnalyzer:
         max_retries: Optional[int] = None,
         timeout: Optional[float] = None
     ) -> ProblemAnalysis:
-        """Analyze a mathematical problem with ADHD optimizations using Claude CLI"""
+        """Analyze a mathematical problem with ADHD optimizations using Claude CLI
+        
+        Each tier is cheaper than the next and serves the common case:
+        1. one-slot last query    3. circuit breaker    5. bulkhead
+        2. LRU cache              4. in-flight dedupe   6. CLI spawn
+        Tiers 1-2 are the fast path; the rest live in _slow_path.
+        """
         if not profile:
             profile = ADHDProfile()
             
         # Check cache first (even if circuit is open)
         cache_key = self._get_cache_key(problem, profile)
         if self.cache_enabled:
-            cached_result = self._get_from_cache(cache_key)
+            cached_result = self._fast_cache_check(cache_key)
             if cached_result is not None:
                 return cached_result
-                
+        
+        return self._slow_path(problem, profile, cache_key, max_retries, timeout)
+    
+    def _fast_cache_check(self, cache_key: int) -> Optional[ProblemAnalysis]:
+        """Cache lookup with no locks, exceptions or datetime arithmetic"""
+        last_query = self._last_query
+        if (last_query is not None and last_query[0] == cache_key and
+                time.monotonic() < last_query[2]):
+            return last_query[1]
+        cached_result = self._get_from_cache(cache_key)
+        if cached_result is not None:
+            self._remember_last_query(cache_key, cached_result)
+        return cached_result
+    
+    def _slow_path(
+        self,
+        problem: Dict[str, Any],
+        profile: ADHDProfile,
+        cache_key: int,
+        max_retries: Optional[int],
+        timeout: Optional[float]
+    ) -> ProblemAnalysis:
+        """Cache miss: circuit check, then a (deduplicated) Claude call or fallback"""
         # Check circuit breaker state after cache
-        if self.circuit_breaker_enabled:
+        try:
             self._check_circuit_state()
+        except CircuitBreakerError:
+            similar_result = self._get_similar_from_cache(problem.get('translated_text', ''))
+            if similar_result is not None:
+                return similar_result
+            raise
             
         # Build prompt
         prompt = self._build_prompt(problem, profile)
@@ -232,38 +362,14 @@ class ClaudeAnalyzer:
         max_retries = max_retries or self.max_retries
         timeout = timeout or self.timeout
         
-        self.total_calls += 1
-        
         try:
-            for attempt in range(max_retries):
-                try:
-                    if attempt > 0:
-                        time.sleep(2 ** attempt)  # Exponential backoff
-                        
-                    response = self._run_claude_cli(prompt, timeout)
-                    
-                    # Success - record in circuit breaker
-                    if self.circuit_breaker_enabled:
-                        self._record_success()
-                    
-                    break
-                except Exception as e:
-                    if attempt == max_retries - 1:
-                        # Record failure in circuit breaker
-                        if self.circuit_breaker_enabled:
-                            self._record_failure()
-                        raise AnalysisError(f"Failed after {max_retries} retries: {str(e)}")
-                    logger.warning(f"CLI call attempt {attempt + 1} failed: {str(e)}")
-            
-            # Parse response
-            try:
-                analysis = self._parse_response(response)
-            except Exception as e:
-                raise AnalysisError(f"Failed parsing response: {str(e)}")
+            analysis = self._run_deduplicated(
+                cache_key, lambda: self._fetch_analysis(prompt, max_retries, timeout))
                 
             # Cache result with LRU management
             if self.cache_enabled:
-                self._put_in_cache(cache_key, analysis)
+                self._put_in_cache(cache_key, analysis, problem.get('translated_text'))
+                self._remember_last_query(cache_key, analysis)
                 
             return analysis
             
@@ -275,6 +381,10 @@ class ClaudeAnalyzer:
                 if cached_result is not None:
                     logger.info("Serving stale cached response due to circuit breaker")
                     return cached_result
+                
+                similar_result = self._get_similar_from_cache(problem.get('translated_text', ''))
+                if similar_result is not None:
+                    return similar_result
                     
                 # Provide fallback analysis
                 fallback_dict = self.get_fallback_analysis(problem.get('translated_text', ''))
@@ -309,10 +419,87 @@ class ClaudeAnalyzer:
             else:
                 raise
     
-    def _get_cache_key(self, problem: Dict, profile: ADHDProfile) -> str:
+    def _fetch_analysis(self, prompt: str, max_retries: int, timeout: float) -> ProblemAnalysis:
+        """Call the CLI and parse its answer"""
+        response = self._run_with_retries(prompt, max_retries, timeout)
+        
+        # Parse response
+        try:
+            return self._parse_response(response)
+        except Exception as e:
+            raise AnalysisError(f"Failed parsing response: {str(e)}")
+    
+    def _run_deduplicated(self, cache_key: int, fetch: Callable[[], T]) -> T:
+        """Run fetch once per key at a time; concurrent callers share its outcome.
+        
+        Matters most when a circuit closes and queued callers for the same
+        problem all arrive together - only one CLI process is spawned.
+        """
+        with self._inflight_lock:
+            future = self._inflight.get(cache_key)
+            owner = future is None
+            if owner:
+                future = self._inflight[cache_key] = Future()
+        
+        if not owner:
+            return future.result()  # Re-raises the owner's error, if any
+        
+        try:
+            result = fetch()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._inflight_lock:
+                del self._inflight[cache_key]
+    
+    def _run_with_retries(self, prompt: str, max_retries: int, timeout: float) -> str:
+        """Run the CLI with exponential backoff, recording the outcome in the circuit breaker
+        
+        A bulkhead slot is held only while the CLI runs, not during the
+        backoff sleeps between attempts.
+        """
+        for attempt in range(max_retries):
+            if attempt > 0:
+                time.sleep(2 ** attempt)  # Exponential backoff
+                
+            if not self._claude_semaphore.acquire(timeout=self.BULKHEAD_WAIT_SECONDS):
+                # Turned away, not failed - leave the circuit counters alone
+                raise CircuitBreakerError(_BUSY_MESSAGE)
+            
+            try:
+                if attempt == 0:
+                    self.total_calls += 1
+                response = self._run_claude_cli(prompt, timeout)
+            except (subprocess.TimeoutExpired, ClaudeTimeoutError) as e:
+                # Fail fast - retrying a call that just timed out only
+                # multiplies the wait
+                self._record_timeout()
+                if isinstance(e, ClaudeTimeoutError):
+                    raise
+                raise ClaudeTimeoutError(f"Claude CLI timeout: {str(e)}")
+            except Exception as e:
+                if attempt == max_retries - 1:
+                    # Record failure in circuit breaker
+                    self._record_failure()
+                    raise AnalysisError(f"Failed after {max_retries} retries: {str(e)}")
+                logger.warning(f"CLI call attempt {attempt + 1} failed: {str(e)}")
+            else:
+                # Success - record in circuit breaker
+                self._record_success()
+                return response
+            finally:
+                self._claude_semaphore.release()
+    
+    def _get_cache_key(self, problem: Dict, profile: ADHDProfile) -> int:
         """Generate cache key for problem + profile"""
         key_data = f"{problem.get('translated_text', '')}{profile.energy_level}{profile.medication_taken}"
-        return hashlib.md5(key_data.encode()).hexdigest()
+        # 64-bit blake2b digest as an int: cheap to hash again on every dict lookup
+        digest = hashlib.blake2b(key_data.encode(), digest_size=8).digest()
+        return int.from_bytes(digest, 'little')
     
     def _build_prompt(self, problem: Dict, profile: ADHDProfile) -> str:
         """Build ADHD-optimized prompt for Claude CLI"""
@@ -374,30 +561,29 @@ Remember:
 
         return prompt
     
+    def _build_batch_prompt(self, texts: List[str], profile: ADHDProfile) -> str:
+        """Build a single prompt asking for one analysis per problem, in order"""
+        numbered = "\n".join(f"{i}. {text}" for i, text in enumerate(texts, 1))
+        prompt = self._build_prompt({'translated_text': 'each of the PROBLEMS listed below'}, profile)
+        return f"""{prompt}
+
+PROBLEMS ({len(texts)}):
+{numbered}
+
+Analyze each problem independently. Return ONLY a JSON array with one
+object per problem, in the order listed, each in the OUTPUT FORMAT above."""
+    
     def _run_claude_cli(self, prompt: str, timeout: float) -> str:
         """Execute Claude Code CLI with proper handling"""
-        
-        # Create temp file for complex prompt
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
-            f.write(prompt)
-            temp_path = f.name
-            
         try:
-            # Prepare command
-            cmd = [self.claude_cmd]
-            
-            # Read prompt from file
-            with open(temp_path, 'r') as f:
-                prompt_content = f.read()
-            
             # Run claude with prompt via stdin
             result = subprocess.run(
-                cmd,
-                input=prompt_content,
+                self._cli_argv,
+                input=prompt,
                 capture_output=True,
                 text=True,
                 timeout=timeout,
-                env={**os.environ, 'CLAUDE_AUTO_ACCEPT': 'true'}
+                env=self._cli_env
             )
             
             if result.returncode != 0:
@@ -406,35 +592,49 @@ Remember:
             return result.stdout
             
         except subprocess.TimeoutExpired:
-            raise AnalysisError(f"Claude CLI timeout after {timeout} seconds")
+            raise ClaudeTimeoutError(f"Claude CLI timeout after {timeout} seconds")
         except FileNotFoundError:
             raise AnalysisError(f"Claude CLI not found. Make sure '{self.claude_cmd}' is installed and in PATH")
-        finally:
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
     
-    def _parse_response(self, output: str) -> ProblemAnalysis:
-        """Extract JSON from Claude CLI output"""
+    def _extract_json(self, output: str, pattern: str = r'\{[\s\S]*\}') -> Any:
+        """Extract the JSON value matching pattern from Claude CLI output"""
         
         # Remove ANSI color codes if present
         ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
         output = ansi_escape.sub('', output)
         
         # Find JSON in output (Claude may add explanatory text)
-        json_match = re.search(r'\{[\s\S]*\}', output)
+        json_match = re.search(pattern, output)
         if not json_match:
             raise ValueError("No JSON found in Claude response")
             
         try:
-            data = json.loads(json_match.group())
+            return _json_loads(json_match.group())
         except json.JSONDecodeError as e:
             # Try to fix common JSON issues
             json_str = json_match.group()
             # Remove trailing commas
             json_str = re.sub(r',\s*}', '}', json_str)
             json_str = re.sub(r',\s*]', ']', json_str)
-            data = json.loads(json_str)
-        
+            return _json_loads(json_str)
+    
+    def _parse_response(self, output: str) -> ProblemAnalysis:
+        """Extract JSON from Claude CLI output"""
+        return self._analysis_from_data(self._extract_json(output))
+    
+    def _parse_batch_response(self, output: str, expected: int) -> List[ProblemAnalysis]:
+        """Extract a JSON array of analyses from a batched Claude CLI call"""
+        try:
+            data = self._extract_json(output, r'\[[\s\S]*\]')
+        except ValueError as e:
+            raise AnalysisError(f"Failed parsing response: {str(e)}")
+        if (not isinstance(data, list) or len(data) != expected or
+                not all(isinstance(item, dict) for item in data)):
+            raise AnalysisError(f"Expected {expected} analyses in batch response")
+        return [self._analysis_from_data(item) for item in data]
+    
+    def _analysis_from_data(self, data: Dict[str, Any]) -> ProblemAnalysis:
+        """Build a ProblemAnalysis from one parsed response object"""
         # Validate and parse response
         analysis_data = data.get('analysis', {})
         steps_data = data.get('steps', [])
@@ -492,67 +692,109 @@ Remember:
         
         return analysis
     
-    def _get_from_cache(self, cache_key: str, ignore_ttl: bool = False) -> Optional[ProblemAnalysis]:
+    def _get_from_cache(self, cache_key: int, ignore_ttl: bool = False) -> Optional[ProblemAnalysis]:
         """Get item from cache with TTL and LRU management"""
-        if cache_key not in self._cache:
+        cached_result = self._cache.get(cache_key)
+        if cached_result is None:
             return None
         
         # Check if entry has expired (unless ignoring TTL for circuit breaker fallback)
-        if not ignore_ttl and cache_key in self._cache_timestamps:
-            entry_time = self._cache_timestamps[cache_key]
-            if datetime.now() - entry_time > self.cache_ttl:
+        if not ignore_ttl:
+            created = self._cache_timestamps.get(cache_key)
+            if created is not None and time.monotonic() - created > self._cache_ttl_seconds:
                 # Remove expired entry
-                del self._cache[cache_key]
-                del self._cache_timestamps[cache_key]
+                self._evict(cache_key)
                 return None
         
         # Move to end (most recently accessed) for LRU
         self._cache.move_to_end(cache_key)
-        return self._cache[cache_key]
+        return cached_result
     
-    def _put_in_cache(self, cache_key: str, analysis: ProblemAnalysis):
+    def _put_in_cache(self, cache_key: int, analysis: ProblemAnalysis,
+                      text: Optional[str] = None):
         """Put item in cache with size and TTL management"""
         # Remove if already exists
         if cache_key in self._cache:
-            del self._cache[cache_key]
-            del self._cache_timestamps[cache_key]
+            self._evict(cache_key)
         
         # Check if cache is full
         if len(self._cache) >= self.max_cache_size:
             # Remove oldest (LRU) entry
-            oldest_key = next(iter(self._cache))
-            del self._cache[oldest_key]
-            del self._cache_timestamps[oldest_key]
+            self._evict(next(iter(self._cache)))
         
         # Add new entry
         self._cache[cache_key] = analysis
-        self._cache_timestamps[cache_key] = datetime.now()
+        self._cache_timestamps[cache_key] = time.monotonic()
+        if text:
+            self._cache_texts[cache_key] = text
+    
+    def _evict(self, cache_key: int):
+        """Drop one cache entry and its bookkeeping"""
+        del self._cache[cache_key]
+        del self._cache_timestamps[cache_key]
+        self._cache_texts.pop(cache_key, None)
+        if self._last_query is not None and self._last_query[0] == cache_key:
+            self._last_query = None
+    
+    def _remember_last_query(self, cache_key: int, analysis: ProblemAnalysis):
+        """Fill the one-slot cache, expiring with the underlying entry"""
+        created = self._cache_timestamps.get(cache_key)
+        if created is None:
+            return
+        self._last_query = (cache_key, analysis, created + self._cache_ttl_seconds)
+    
+    def _get_similar_from_cache(self, text: str) -> Optional[ProblemAnalysis]:
+        """Find a cached analysis of a near-identical problem (outage fallback).
+        
+        Only used while Claude is unavailable, so a linear scan over the
+        bounded cache is fine. Stale entries are accepted, as with the
+        exact-match fallback.
+        """
+        if not text or not self.cache_enabled:
+            return None
+        
+        matcher = difflib.SequenceMatcher(None, b=text)
+        best_key, best_ratio = None, self.SIMILAR_PROBLEM_RATIO
+        for cache_key, cached_text in self._cache_texts.items():
+            matcher.set_seq1(cached_text)
+            # Cheap upper bounds first; ratio() is quadratic
+            if (matcher.real_quick_ratio() >= best_ratio and
+                    matcher.quick_ratio() >= best_ratio):
+                ratio = matcher.ratio()
+                if ratio >= best_ratio:
+                    best_key, best_ratio = cache_key, ratio
+        
+        if best_key is None:
+            return None
+        logger.info(f"Serving cached analysis of a similar problem ({best_ratio:.0%} match)")
+        return self._cache[best_key]
     
     def _cleanup_expired_cache(self):
         """Clean up expired cache entries (can be called periodically)"""
-        current_time = datetime.now()
+        current_time = time.monotonic()
         expired_keys = []
         
         for cache_key, timestamp in self._cache_timestamps.items():
-            if current_time - timestamp > self.cache_ttl:
+            if current_time - timestamp > self._cache_ttl_seconds:
                 expired_keys.append(cache_key)
         
         for key in expired_keys:
-            del self._cache[key]
-            del self._cache_timestamps[key]
+            self._evict(key)
     
-    def _is_cache_valid(self, cache_key: str) -> bool:
+    def _is_cache_valid(self, cache_key: int) -> bool:
         """Check if cache entry is valid (not expired)"""
         if cache_key not in self._cache_timestamps:
             return False
         
         entry_time = self._cache_timestamps[cache_key]
-        return datetime.now() - entry_time <= self.cache_ttl
+        return time.monotonic() - entry_time <= self._cache_ttl_seconds
     
     def clear_cache(self):
         """Clear all cache entries"""
         self._cache.clear()
         self._cache_timestamps.clear()
+        self._cache_texts.clear()
+        self._last_query = None
     
     def analyze_problems(self, content: str, timeout: Optional[float] = None) -> Dict[str, Any]:
         """Analyze problems with circuit breaker protection (plural interface)."""
@@ -564,110 +806,198 @@ Remember:
         
         try:
             analysis = self.analyze_problem(problem, profile, timeout=timeout)
-            # Handle both ProblemAnalysis object and dict responses
-            if isinstance(analysis, dict):
-                # Legacy dict format
-                return analysis
-            else:
-                # ProblemAnalysis object format
-                return {
-                    'problems': [{
-                        'text': content,
-                        'steps': [{'content': step.description} for step in analysis.steps],
-                        'hints': [],
-                        'difficulty': analysis.difficulty_rating
-                    }]
-                }
+            return self._to_problems_dict(content, analysis)
         except CircuitBreakerError:
             # Re-raise circuit breaker errors as-is
             raise
         except AnalysisError as e:
             # Only convert to circuit breaker error if circuit is open
             if self.circuit_state == CircuitState.OPEN:
-                raise CircuitBreakerError(
-                    "Claude AI is temporarily having trouble, but don't worry! "
-                    "You can continue learning while it recovers. "
-                    "Try manual problem entry or take a short break."
-                )
+                raise CircuitBreakerError(_RECOVERING_MESSAGE)
             else:
                 raise e
     
+    def analyze_problems_batch(self, contents: List[str],
+                               timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Analyze several problems with one circuit check and one CLI call.
+        
+        Cached problems are served directly; the remaining distinct texts
+        go to Claude together. Results come back in the order of contents.
+        """
+        profile = ADHDProfile()
+        keys = [self._get_cache_key({'translated_text': content}, profile) for content in contents]
+        
+        analyses: Dict[int, ProblemAnalysis] = {}
+        misses: Dict[int, str] = {}  # Distinct uncached texts, in first-seen order
+        for key, content in zip(keys, contents):
+            if key in analyses or key in misses:
+                continue
+            cached_result = self._get_from_cache(key) if self.cache_enabled else None
+            if cached_result is not None:
+                analyses[key] = cached_result
+            else:
+                misses[key] = content
+        
+        if misses:
+            self._check_circuit_state()
+            prompt = self._build_batch_prompt(list(misses.values()), profile)
+            try:
+                response = self._run_with_retries(prompt, self.max_retries, timeout or self.timeout)
+                results = self._parse_batch_response(response, len(misses))
+            except AnalysisError:
+                if self.circuit_state == CircuitState.OPEN:
+                    raise CircuitBreakerError(_RECOVERING_MESSAGE)
+                raise
+            
+            for key, analysis in zip(misses, results):
+                analyses[key] = analysis
+                if self.cache_enabled:
+                    self._put_in_cache(key, analysis, misses[key])
+        
+        return [self._to_problems_dict(content, analyses[key])
+                for key, content in zip(keys, contents)]
+    
+    def _to_problems_dict(self, content: str, analysis: Any) -> Dict[str, Any]:
+        """Wrap an analysis in the plural {'problems': [...]} format"""
+        # Handle both ProblemAnalysis object and dict responses
+        if isinstance(analysis, dict):
+            # Legacy dict format
+            return analysis
+        # ProblemAnalysis object format
+        return {
+            'problems': [{
+                'text': content,
+                'steps': [{'content': step.description} for step in analysis.steps],
+                'hints': [],
+                'difficulty': analysis.difficulty_rating
+            }]
+        }
+    
+    def _transition_to(self, new_state: CircuitState) -> bool:
+        """Move to new_state; returns False if already there (a no-op).
+        
+        Callers must hold _state_lock.
+        """
+        if self.circuit_state == new_state:
+            return False
+        self.circuit_state = new_state
+        return True
+    
     def _check_circuit_state(self):
         """Check circuit breaker state and throw error if open."""
-        if self.circuit_state == CircuitState.OPEN:
+        if self.circuit_state == CircuitState.CLOSED:
+            # Common case - no lock needed to let the call through
+            return
+        
+        with self._state_lock:
+            if self.circuit_state == CircuitState.HALF_OPEN:
+                # Probes always go through; after that, admit a growing share
+                # so a just-recovered Claude isn't hit with everything at once
+                if (self.half_open_calls < self.half_open_max_calls or
+                        random.random() < self._recovery_fraction):
+                    return
+                raise CircuitBreakerError(_RECOVERING_MESSAGE)
+            
             # Check if enough time has passed for recovery attempt
-            if (self.last_failure_time and 
-                datetime.now() - self.last_failure_time >= timedelta(seconds=self.recovery_timeout)):
+            if (self.last_failure_time is not None and
+                time.monotonic() - self.last_failure_time >= self.recovery_timeout):
                 # Transition to half-open for testing
-                self.circuit_state = CircuitState.HALF_OPEN
+                self._transition_to(CircuitState.HALF_OPEN)
                 self.half_open_calls = 0
+                self._recovery_fraction = 0.0
+                self._persist_state()
                 logger.info("Circuit breaker transitioning to half-open state")
-            else:
-                # Still in open state, block the call
-                raise CircuitBreakerError(
-                    "Claude AI is temporarily having trouble, but don't worry! "
-                    "It's taking a short break to recover. "
-                    f"Please try again in {self._get_recovery_time_remaining()} seconds, "
-                    "or continue with manual problem entry."
-                )
-        elif self.circuit_state == CircuitState.HALF_OPEN:
-            # Allow calls up to the limit
-            pass
+                return
+        
+        # Still in open state, block the call. Round the wait up to
+        # 10s so a storm of blocked calls shares a few message strings.
+        seconds_remaining = -(-self._get_recovery_time_remaining() // 10) * 10
+        raise CircuitBreakerError(_format_outage_message(seconds_remaining))
     
     def _record_success(self):
         """Record successful call in circuit breaker."""
-        if self.circuit_state == CircuitState.HALF_OPEN:
-            self.half_open_calls += 1
-            
-            # If we've had enough successful calls in half-open, close the circuit
-            if self.half_open_calls >= self.half_open_max_calls:
-                self.circuit_state = CircuitState.CLOSED
-                self.failure_count = 0
-                self.half_open_calls = 0
-                self.recovery_timeout = self.initial_recovery_timeout  # Reset backoff
-                self._notify_recovery()
-                logger.info("Circuit breaker closed - service recovered")
-        elif self.circuit_state == CircuitState.CLOSED:
-            # Reset failure count on success
-            if self.failure_count > 0:
-                self.failure_count = 0
+        with self._state_lock:
+            if self.circuit_state == CircuitState.HALF_OPEN:
+                self.half_open_calls += 1
+                self._recovery_fraction = self.half_open_calls / self.recovery_ramp_calls
+                
+                # If we've had enough successful calls in half-open, close the circuit
+                if (self.half_open_calls >= self.recovery_ramp_calls and
+                        self._transition_to(CircuitState.CLOSED)):
+                    self.failure_count = 0
+                    self.half_open_calls = 0
+                    self._trip_count = 0
+                    self.recovery_timeout = self.initial_recovery_timeout  # Reset backoff
+                    self._notify_recovery()
+                    logger.info("Circuit breaker closed - service recovered")
+            elif self.circuit_state == CircuitState.CLOSED:
+                # Reset failure count on success
+                if self.failure_count > 0:
+                    self.failure_count = 0
+            self.timeout_count = 0
+            self._persist_state()
     
     def _record_failure(self):
         """Record failed call in circuit breaker."""
-        self.failure_count += 1
+        with self._state_lock:
+            self.failure_count += 1
+            self._record_problem(self.failure_count, self.failure_threshold, "failures")
+    
+    def _record_timeout(self):
+        """Record timed-out call; only a longer run of these opens the circuit."""
+        with self._state_lock:
+            self.timeout_count += 1
+            self._record_problem(self.timeout_count, self.timeout_threshold, "consecutive timeouts")
+    
+    def _record_problem(self, count: int, threshold: int, kind: str):
+        """Shared failure/timeout bookkeeping; callers must hold _state_lock."""
         self.failed_calls += 1
-        self.last_failure_time = datetime.now()
+        self.last_failure_time = time.monotonic()
         
         if self.circuit_state == CircuitState.HALF_OPEN:
             # Failure in half-open state - go back to open
-            self.circuit_state = CircuitState.OPEN
+            self._transition_to(CircuitState.OPEN)
             self._calculate_backoff_timeout()
             logger.warning("Circuit breaker opened - service still failing")
-        elif (self.circuit_state == CircuitState.CLOSED and 
-              self.failure_count >= self.failure_threshold):
-            # Too many failures - open the circuit
-            self.circuit_state = CircuitState.OPEN
+        elif count >= threshold and self._transition_to(CircuitState.OPEN):
+            # Too many problems while closed - open the circuit.
+            # Already open is a no-op, so racing failures trip it once.
             self.circuit_opened_count += 1
             self._calculate_backoff_timeout()
-            logger.warning(f"Circuit breaker opened after {self.failure_count} failures")
+            logger.warning(f"Circuit breaker opened after {count} {kind}")
+        self._persist_state()
     
     def _calculate_backoff_timeout(self):
         """Calculate exponential backoff for recovery timeout."""
-        # Exponential backoff: double the timeout each time, up to max
-        backoff_multiplier = 2 ** (self.circuit_opened_count - 1)
-        self.recovery_timeout = min(
-            self.initial_recovery_timeout * backoff_multiplier,
+        self._trip_count += 1
+        self.recovery_timeout = self._compute_backoff(self._trip_count)
+        logger.debug(f"Recovery timeout set to {self.recovery_timeout:.1f} seconds")
+    
+    def _compute_backoff(self, trip_count: int) -> float:
+        """Recovery timeout for the given consecutive trip, with jitter.
+        
+        Grows by backoff_factor per trip up to max_recovery_timeout. The
+        +/-50% jitter keeps several analyzers from probing Claude in lockstep.
+        """
+        delay = min(
+            self.initial_recovery_timeout * self.backoff_factor ** (trip_count - 1),
             self.max_recovery_timeout
         )
-        logger.debug(f"Recovery timeout set to {self.recovery_timeout} seconds")
+        return min(delay * random.uniform(0.5, 1.5), self.max_recovery_timeout)
     
     def _get_recovery_time_remaining(self) -> int:
         """Get seconds remaining until recovery attempt."""
-        if not self.last_failure_time:
+        if self.last_failure_time is None:
             return 0
-        elapsed = (datetime.now() - self.last_failure_time).total_seconds()
+        elapsed = time.monotonic() - self.last_failure_time
         return max(0, int(self.recovery_timeout - elapsed))
     
+    def _seconds_since_failure(self) -> Optional[float]:
+        """Seconds elapsed since the last recorded failure, if any."""
+        if self.last_failure_time is None:
+            return None
+        return time.monotonic() - self.last_failure_time
+    
     def _notify_recovery(self):
         """Notify that circuit breaker has recovered (placeholder for future notification)."""
         # This could trigger a UI notification in the future
@@ -750,7 +1080,7 @@ Remember:
             'success_rate': success_rate,
             'failure_count': self.failure_count,
             'circuit_opened_count': self.circuit_opened_count,
-            'last_failure_time': self.last_failure_time.isoformat() if self.last_failure_time else None,
+            'seconds_since_failure': self._seconds_since_failure(),
             'recovery_timeout': self.recovery_timeout,
             'time_until_recovery': self._get_recovery_time_remaining()
         }
@@ -774,7 +1104,8 @@ Remember:
         return {
             'circuit_state': self.circuit_state.value,
             'failure_count': self.failure_count,
-            'last_failure_time': self.last_failure_time.isoformat() if self.last_failure_time else None,
+            # Monotonic clocks don't survive a restart, so store the age instead
+            'seconds_since_failure': self._seconds_since_failure(),
             'half_open_calls': self.half_open_calls,
             'recovery_timeout': self.recovery_timeout,
             'circuit_opened_count': self.circuit_opened_count,
@@ -784,14 +1115,60 @@ Remember:
     
     def restore_circuit_state(self, state: Dict[str, Any]):
         """Restore circuit breaker state from saved data."""
-        self.circuit_state = CircuitState(state['circuit_state'])
-        self.failure_count = state['failure_count']
-        self.last_failure_time = datetime.fromisoformat(state['last_failure_time']) if state['last_failure_time'] else None
-        self.half_open_calls = state['half_open_calls']
-        self.recovery_timeout = state['recovery_timeout']
-        self.circuit_opened_count = state['circuit_opened_count']
-        self.total_calls = state['total_calls']
-        self.failed_calls = state['failed_calls']
+        with self._state_lock:
+            self.circuit_state = CircuitState(state['circuit_state'])
+            self.failure_count = state['failure_count']
+            seconds_since_failure = state['seconds_since_failure']
+            self.last_failure_time = (time.monotonic() - seconds_since_failure
+                                      if seconds_since_failure is not None else None)
+            self.half_open_calls = state['half_open_calls']
+            self.recovery_timeout = state['recovery_timeout']
+            self.circuit_opened_count = state['circuit_opened_count']
+            self.total_calls = state['total_calls']
+            self.failed_calls = state['failed_calls']
+            self._persist_state()
+    
+    def _open_state_map(self, state_path: str):
+        """Map the state file (creating it if needed) and restore from it."""
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(state_path)), exist_ok=True)
+            with open(state_path, 'a+b') as f:
+                if os.fstat(f.fileno()).st_size < _STATE_LAYOUT.size:
+                    f.truncate(_STATE_LAYOUT.size)
+                # The mapping stays valid after the file is closed
+                self._state_map = mmap.mmap(f.fileno(), _STATE_LAYOUT.size)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Circuit state will not persist ({state_path}): {e}")
+            return
+        
+        magic, state_index, failures, trips, failed_at, recovery = \
+            _STATE_LAYOUT.unpack_from(self._state_map)
+        if magic != _STATE_MAGIC or state_index >= len(_STATES):
+            return  # New or foreign file
+        if failed_at > time.monotonic():
+            return  # Written before a reboot; the clock has restarted
+        
+        self.circuit_state = _STATES[state_index]
+        self.failure_count = failures
+        self._trip_count = trips
+        self.last_failure_time = None if math.isnan(failed_at) else failed_at
+        self.recovery_timeout = recovery
+        if self.circuit_state != CircuitState.CLOSED:
+            logger.info(f"Restored {self.circuit_state.value} circuit breaker state")
+    
+    def _persist_state(self):
+        """Store breaker state in the mapped file; callers must hold _state_lock.
+        
+        A plain memory write - the OS flushes the page, so a crashed app
+        still leaves the latest state behind without an fsync per call.
+        """
+        if self._state_map is None:
+            return
+        failed_at = math.nan if self.last_failure_time is None else self.last_failure_time
+        _STATE_LAYOUT.pack_into(
+            self._state_map, 0, _STATE_MAGIC, _STATES.index(self.circuit_state),
+            self.failure_count, self._trip_count, failed_at, float(self.recovery_timeout)
+        )
 
 
 # Convenience function for quick analysis
@@ -6,6 +6,7 @@ import shutil
 import time
 from pathlib import Path
 from watchdog.observers import Observer
+from watchdog.observers.polling import PollingObserver
 from watchdog.events import FileSystemEventHandler
 import logging
 
@@ -96,7 +97,8 @@ class EnhancedFileWatcher:
         inbox_dir: str = None,
         processed_dir: str = None,
         max_workers: int = 3,
-        db_path: str = None
+        db_path: str = None,
+        watch_interval: float = 30.0
     ):
         project_root = Path("/home/puncher/focusquest")
         self.inbox_dir = Path(inbox_dir) if inbox_dir else project_root / "inbox"
@@ -112,18 +114,36 @@ class EnhancedFileWatcher:
             max_workers=max_workers
         )
         
-        # Initialize observer
+        # Initialize observer (inotify/native; polling only as fallback)
+        self.watch_interval = watch_interval
         self.observer = Observer()
         self.handler = EnhancedPDFHandler(self.queue_processor, self.processed_dir)
         
+    def _start_observer(self):
+        """Start the native observer, falling back to polling if unavailable.
+        
+        Native backends (inotify on Linux) cost nothing while idle, but can
+        fail on network mounts or when the inotify watch limit is exhausted.
+        """
+        try:
+            self.observer.schedule(self.handler, str(self.inbox_dir), recursive=False)
+            self.observer.start()
+        except OSError as e:
+            logger.warning(
+                f"Native file observer unavailable ({e}), "
+                f"polling every {self.watch_interval}s instead"
+            )
+            self.observer = PollingObserver(timeout=self.watch_interval)
+            self.observer.schedule(self.handler, str(self.inbox_dir), recursive=False)
+            self.observer.start()
+        
     def start(self):
         """Start watching and processing"""
         # Start queue processor
         self.queue_processor.start()
         
         # Start file observer
-        self.observer.schedule(self.handler, str(self.inbox_dir), recursive=False)
-        self.observer.start()
+        self._start_observer()
         
         print(f"""
 ╔══════════════════════════════════════════════════════╗
@@ -207,6 +227,8 @@ def main():
     parser.add_argument("--processed", help="Processed files directory")
     parser.add_argument("--workers", type=int, default=3, help="Max concurrent workers")
     parser.add_argument("--db", help="Queue database path")
+    parser.add_argument("--watch-interval", type=float, default=30.0,
+                        help="Polling interval in seconds if native file events are unavailable")
     
     args = parser.parse_args()
     
@@ -214,7 +236,8 @@ def main():
         inbox_dir=args.inbox,
         processed_dir=args.processed,
         max_workers=args.workers,
-        db_path=args.db
+        db_path=args.db,
+        watch_interval=args.watch_interval
     )
     
     # Process existing files first
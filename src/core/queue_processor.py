@@ -5,7 +5,7 @@ import time
 import threading
 import logging
 from concurrent.futures import ThreadPoolExecutor, Future
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional
 from pathlib import Path
 
 from src.core.processing_queue import ProcessingQueue, QueueItem
@@ -59,6 +59,9 @@ class QueueProcessor:
         self._pdf_processor = None
         self._claude_analyzer = None
         
+        # Called whenever an item is added or fails (may run on worker threads)
+        self._queue_listeners: List[Callable[[], None]] = []
+        
     def start(self):
         """Start the queue processor with resource monitoring"""
         if self.is_running:
@@ -236,6 +239,8 @@ class QueueProcessor:
                 logger.info(f"Will retry {item.pdf_path} (attempt {item.attempts + 1}/{ProcessingQueue.MAX_RETRIES})")
                 self.queue.mark_for_retry(item.id)
                 
+            self._notify_queue_changed()
+                
     def _handle_future_completion(self, future: Future, item: QueueItem):
         """Handle completion of a processing future"""
         try:
@@ -323,4 +328,19 @@ class QueueProcessor:
         if priority is None:
             priority = Priority.NORMAL
             
-        return self.queue.add_item(pdf_path, priority)
\ No newline at end of file
+        item_id = self.queue.add_item(pdf_path, priority)
+        if item_id:
+            self._notify_queue_changed()
+        return item_id
+        
+    def add_queue_listener(self, listener: Callable[[], None]):
+        """Register a callback fired when a PDF is queued or its processing fails"""
+        self._queue_listeners.append(listener)
+        
+    def _notify_queue_changed(self):
+        """Tell listeners the queue contents changed"""
+        for listener in self._queue_listeners:
+            try:
+                listener()
+            except Exception as e:
+                logger.error(f"Queue listener failed: {e}")
\ No newline at end of file
@@ -265,6 +265,14 @@ class StateSynchronizer(QObject):
         # Individual components should call specific update methods
         logger.debug("Auto-save triggered")
         
+    def finalize(self):
+        """Save final state and end the session on shutdown."""
+        # No auto-save may fire once the session has ended
+        self.auto_save_timer.stop()
+        
+        self.save_current_state()
+        self.end_session()
+        
     def load_last_state(self) -> Dict[str, Any]:
         """Load last saved state from database."""
         try:
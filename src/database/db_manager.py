@@ -17,7 +17,13 @@ class DatabaseManager:
         if db_path is None:
             db_path = str(Path("data") / "focusquest.db")
             
-        self.engine = create_engine(f"sqlite:///{db_path}", echo=False)
+        # Larger compiled-statement cache so hot queue/problem queries
+        # never fall out of it and get recompiled
+        self.engine = create_engine(
+            f"sqlite:///{db_path}",
+            echo=False,
+            query_cache_size=1200
+        )
         self.SessionLocal = sessionmaker(bind=self.engine, autocommit=False, autoflush=False)
         
         # Create tables
@@ -34,4 +40,8 @@ class DatabaseManager:
             session.rollback()
             raise
         finally:
-            session.close()
\ No newline at end of file
+            session.close()
+            
+    def dispose(self):
+        """Close pooled connections (the engine reconnects if used again)"""
+        self.engine.dispose()
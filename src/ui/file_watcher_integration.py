@@ -9,6 +9,7 @@ from PyQt6.QtWidgets import QMessageBox
 from src.core.enhanced_file_watcher import EnhancedFileWatcher
 from src.core.queue_processor import QueueProcessor
 from src.core.problem_monitor import ProblemMonitor
+from src.core.processing_queue import ProcessingQueue
 from src.database.db_manager import DatabaseManager
 
 logger = logging.getLogger(__name__)
@@ -68,12 +69,17 @@ class FileWatcherIntegration(QObject):
     error_occurred = pyqtSignal(str)
     queue_size_changed = pyqtSignal(int)
     
-    def __init__(self, inbox_dir: str = "inbox", db_manager: Optional[DatabaseManager] = None):
+    # Raised from watcher/worker threads; delivered queued to the GUI thread
+    _queue_modified = pyqtSignal()
+    
+    def __init__(self, inbox_dir: str = "inbox", db_manager: Optional[DatabaseManager] = None,
+                 watch_interval: float = 30.0):
         """Initialize file watcher integration.
         
         Args:
             inbox_dir: Directory to watch for PDFs
             db_manager: Database manager instance
+            watch_interval: Polling interval (seconds) if native watching is unavailable
         """
         super().__init__()
         
@@ -86,7 +92,8 @@ class FileWatcherIntegration(QObject):
         # Initialize components
         self.file_watcher = EnhancedFileWatcher(
             watch_dir=str(self.inbox_dir),
-            db_manager=self.db_manager
+            db_manager=self.db_manager,
+            watch_interval=watch_interval
         )
         
         self.queue_processor = QueueProcessor(
@@ -100,6 +107,14 @@ class FileWatcherIntegration(QObject):
         self.problem_monitor.new_problem_ready.connect(self.new_problem_ready)
         self.problem_monitor.error_occurred.connect(self.error_occurred)
         
+        # A finished analysis means the processing queue shrank
+        self.problem_monitor.new_problem_ready.connect(self._update_queue_size)
+        
+        # Dropped PDFs and failed analyses change the queue too
+        self._queue_modified.connect(self._update_queue_size)
+        self.file_watcher.queue_processor.add_queue_listener(self._queue_modified.emit)
+        self.queue_processor.add_queue_listener(self._queue_modified.emit)
+        
         # Thread for file watcher
         self.watcher_thread = None
         self._is_paused = False
@@ -117,6 +132,7 @@ class FileWatcherIntegration(QObject):
             self.watcher_thread = FileWatcherThread(self.file_watcher)
             self.watcher_thread.error_occurred.connect(self._handle_watcher_error)
             self.watcher_thread.status_update.connect(self.status_changed)
+            self.watcher_thread.status_update.connect(self._update_queue_size)
             self.watcher_thread.start()
             
             # Start problem monitor
@@ -154,6 +170,7 @@ class FileWatcherIntegration(QObject):
             self.queue_processor.pause()
             self._is_paused = True
             self.status_changed.emit("Processing paused for break")
+            self._update_queue_size()
             
     def resume_processing(self):
         """Resume processing after break."""
@@ -162,6 +179,7 @@ class FileWatcherIntegration(QObject):
             self.queue_processor.resume()
             self._is_paused = False
             self.status_changed.emit("Processing resumed")
+            self._update_queue_size()
             
     def is_paused(self) -> bool:
         """Check if processing is paused."""
@@ -170,15 +188,14 @@ class FileWatcherIntegration(QObject):
     def get_queue_size(self) -> int:
         """Get number of items in processing queue."""
         try:
-            from src.core.processing_queue import ProcessingQueue
             with ProcessingQueue(self.db_manager) as queue:
                 return queue.get_pending_count()
         except Exception as e:
             logger.error(f"Error getting queue size: {e}")
             return 0
             
-    def _update_queue_size(self):
-        """Update queue size signal."""
+    def _update_queue_size(self, *args):
+        """Emit queue size whenever the processing queue may have changed."""
         size = self.get_queue_size()
         self.queue_size_changed.emit(size)
         
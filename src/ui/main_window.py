@@ -3,7 +3,7 @@ Main window for FocusQuest - ADHD-optimized learning interface
 """
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QStackedWidget, QLabel, QGraphicsOpacityEffect
+    QPushButton, QStackedWidget, QLabel, QGraphicsOpacityEffect, QApplication
 )
 from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QPropertyAnimation, QEasingCurve
 from PyQt6.QtGui import QKeySequence, QAction, QPalette, QColor, QShortcut
@@ -11,7 +11,7 @@ from typing import Optional
 
 from src.ui.problem_widget import ProblemWidget
 from src.ui.xp_widget import XPWidget
-from src.ui.styles import DARK_THEME_STYLE
+from src.ui.styles import apply_theme
 
 
 class FocusQuestWindow(QMainWindow):
@@ -146,7 +146,7 @@ class FocusQuestWindow(QMainWindow):
         
     def apply_dark_theme(self):
         """Apply dark theme for reduced eye strain"""
-        self.setStyleSheet(DARK_THEME_STYLE)
+        apply_theme(QApplication.instance())
         
         # Also set palette for native widgets
         palette = QPalette()
@@ -166,6 +166,12 @@ class FocusQuestWindow(QMainWindow):
         """Load a new problem for solving"""
         # Remove old problem widget if exists
         if self.problem_widget:
+            # Disconnect before deleteLater so late emits can't reach us
+            try:
+                self.problem_widget.step_completed.disconnect(self.on_step_completed)
+                self.problem_widget.problem_completed.disconnect(self.on_problem_completed)
+            except (TypeError, RuntimeError):
+                pass  # Already disconnected or widget gone
             self.problem_stack.removeWidget(self.problem_widget)
             self.problem_widget.deleteLater()
             
@@ -2,15 +2,44 @@
 import logging
 from typing import Optional, List, Dict, Any
 from collections import deque
-from PyQt6.QtCore import pyqtSignal, QTimer
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QSettings
 from PyQt6.QtWidgets import QMessageBox
+from sqlalchemy import select, bindparam, Integer
+from sqlalchemy.orm import selectinload
 
 from src.ui.main_window import FocusQuestWindow
 from src.ui.file_watcher_integration import FileWatcherIntegration
 from src.database.db_manager import DatabaseManager
+from src.database.models import Problem, ProblemAttempt, ProblemStep
 
 logger = logging.getLogger(__name__)
 
+# Database prefetch tuning for the problem queue
+REFILL_BATCH = 20
+
+# Built once so SQLAlchemy's compiled cache is hit on every refill
+_UNCOMPLETED_PROBLEMS_STMT = (
+    select(
+        Problem.id,
+        Problem.original_text,
+        Problem.translated_text,
+        Problem.difficulty
+    )
+    .where(~Problem.attempts.any(ProblemAttempt.completed == True))
+    .where(Problem.id.notin_(bindparam('skip_ids', expanding=True)))
+    .order_by(Problem.id)
+    .limit(bindparam('batch', type_=Integer))
+)
+
+# Steps and their hints for a whole batch; selectinload fetches every
+# step's hints in one extra query instead of one lazy load per step
+_STEPS_FOR_PROBLEMS_STMT = (
+    select(ProblemStep)
+    .options(selectinload(ProblemStep.hints))
+    .where(ProblemStep.problem_id.in_(bindparam('problem_ids', expanding=True)))
+    .order_by(ProblemStep.problem_id, ProblemStep.step_number)
+)
+
 
 class FocusQuestIntegratedWindow(FocusQuestWindow):
     """Main window with integrated file watching and problem queue.
@@ -25,45 +54,86 @@ class FocusQuestIntegratedWindow(FocusQuestWindow):
     # Additional signals
     queue_status_changed = pyqtSignal(int)  # Queue size changed
     
-    def __init__(self):
-        """Initialize integrated window."""
+    # Refill from the database when fewer than this many problems are queued
+    LOW_WATERMARK = 5
+    
+    # Upper bound on queued problems (prevents unbounded memory growth)
+    QUEUE_CAPACITY = 100
+    
+    # Window title templates
+    TITLE_READY = "FocusQuest - {} problems ready"
+    TITLE_PROCESSING = "FocusQuest - Processing {} files..."
+    TITLE_IDLE = "FocusQuest - Drop PDFs in inbox folder"
+    
+    def __init__(self, watch_interval: float = 30.0):
+        """Initialize integrated window.
+        
+        Args:
+            watch_interval: File watcher polling interval (seconds), only used
+                when native filesystem events are unavailable
+        """
         super().__init__()
         
+        # Resolve optional capabilities once instead of probing per event
+        notify = getattr(self, 'show_notification', None)
+        self._notify = notify if callable(notify) else None
+        self._super_enter_panic = getattr(super(), 'enter_panic_mode', None)
+        self._super_exit_panic = getattr(super(), 'exit_panic_mode', None)
+        
         # Initialize database
         self.db_manager = DatabaseManager()
         
         # Problem queue (from both DB and file watcher)
-        self.problem_queue = deque(maxlen=100)  # Limit to prevent memory issues
+        self.problem_queue = deque(maxlen=self.QUEUE_CAPACITY)
+        
+        # Last processing-queue size reported by the watcher, last title set
+        # and last (queue, processing) sizes pushed to the UI
+        self._processing_size = 0
+        self._last_title = None
+        self._last_ui_queue = (-1, -1)
         
         # File watcher integration
-        self.file_watcher = FileWatcherIntegration(db_manager=self.db_manager)
+        self.file_watcher = FileWatcherIntegration(
+            db_manager=self.db_manager,
+            watch_interval=watch_interval
+        )
         
-        # Connect file watcher signals
-        self.file_watcher.new_problem_ready.connect(self._on_new_problem_from_file)
+        # Connect file watcher signals. Queued so the monitor's scan and the
+        # queue-size refresh return immediately; the UI work runs on the
+        # next event-loop pass
+        self.file_watcher.new_problem_ready.connect(
+            self._on_new_problem_from_file, Qt.ConnectionType.QueuedConnection
+        )
         self.file_watcher.status_changed.connect(self._on_watcher_status_changed)
         self.file_watcher.error_occurred.connect(self._on_watcher_error)
-        self.file_watcher.queue_size_changed.connect(self._update_queue_display)
+        self.file_watcher.queue_size_changed.connect(
+            self._on_processing_size_changed, Qt.ConnectionType.QueuedConnection
+        )
+        
+        # Completing and skipping both advance through a single slot
+        self.problem_completed.connect(lambda _pid: self._advance(completed=True))
+        self.problem_skipped.connect(lambda _pid: self._advance(completed=False))
         
-        # Connect existing signals
-        self.problem_completed.connect(self._load_next_from_queue)
-        self.problem_skipped.connect(self._load_next_from_queue)
+        # Pause processing during breaks (event-driven, no polling)
+        if hasattr(self, 'session_manager'):
+            self.session_manager.break_started.connect(self._on_break_started)
+            self.session_manager.break_ended.connect(self._on_break_ended)
         
         # Start file watcher
         self.file_watcher.start()
         
-        # Show inbox hint on first run
-        self._show_initial_hint()
+        # Show inbox hint on first run, after the window is up
+        QTimer.singleShot(0, self._show_initial_hint)
         
         # Update window title with queue status
         self._update_window_title()
         
-        # Timer for periodic queue updates
-        self.queue_timer = QTimer()
-        self.queue_timer.timeout.connect(self._check_queue_status)
-        self.queue_timer.start(5000)  # Check every 5 seconds
-        
     def _show_initial_hint(self):
-        """Show helpful hint about inbox on startup."""
+        """Show helpful hint about inbox on first run only."""
+        settings = QSettings("FocusQuest", "MainWindow")
+        if settings.value("inbox_hint_shown", False, type=bool):
+            return
+            
         hint = self.file_watcher.show_inbox_hint()
         QMessageBox.information(
             self,
@@ -71,13 +141,15 @@ class FocusQuestIntegratedWindow(FocusQuestWindow):
             hint,
             QMessageBox.StandardButton.Ok
         )
+        settings.setValue("inbox_hint_shown", True)
         
     def _on_new_problem_from_file(self, problem_data: Dict[str, Any]):
         """Handle new problem from file watcher."""
         logger.info(f"New problem received from file watcher: {problem_data.get('id')}")
         
         # Add to queue with priority
-        self.problem_queue.appendleft(problem_data)  # New problems go to front
+        problem = self._row_to_problem('file_watcher', problem_data)
+        self.problem_queue.appendleft(problem)  # New problems go to front
         
         # Update display
         self._update_queue_display(len(self.problem_queue))
@@ -87,95 +159,163 @@ class FocusQuestIntegratedWindow(FocusQuestWindow):
             self._load_next_from_queue()
         else:
             # Show notification if method exists
-            if hasattr(self, 'show_notification'):
-                self.show_notification(
+            if self._notify:
+                self._notify(
                     "New Problem Ready! 📚",
                     "A new problem has been analyzed and added to your queue.",
                     duration=3000
                 )
             
+    def _advance(self, completed: bool):
+        """Move on from the current problem once it is completed or skipped.
+        
+        Subclasses record the outcome here before calling super(), so the
+        queue pop and the queue/title refresh happen once per advancement.
+        """
+        self._load_next_from_queue()
+        
     def _load_next_from_queue(self, *args):
         """Load next problem from queue."""
+        # Top up from the database before the queue runs dry
+        if len(self.problem_queue) < self.LOW_WATERMARK:
+            self._refill_queue_from_database()
+            
         if not self.problem_queue:
-            # Try to load from database
-            self._load_problem_from_database()
+            # No problems available
+            if self._notify:
+                self._notify(
+                    "No Problems Available",
+                    "Drop a PDF in the inbox folder to add new problems!",
+                    duration=5000
+                )
             return
             
-        # Get next problem
+        # Get next problem and load into UI
         problem_data = self.problem_queue.popleft()
-        
-        # Format for display
-        formatted_problem = self._format_problem_for_display(problem_data)
-        
-        # Load into UI
-        self.load_problem(formatted_problem)
+        self.load_problem(problem_data)
         
         # Update queue display
         self._update_queue_display(len(self.problem_queue))
         
-    def _format_problem_for_display(self, problem_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Format problem data for the problem widget."""
-        # Extract relevant fields based on source
-        if problem_data.get('source') == 'file_watcher':
-            # From Claude analysis
+    @staticmethod
+    def _row_to_problem(source: str, data) -> Dict[str, Any]:
+        """Build the problem dict the widget expects, with a fixed key set.
+        
+        ``data`` is a database ``Row._mapping`` or an analysis result from
+        the file watcher, which names the text and difficulty differently.
+        """
+        if source == 'file_watcher':
             return {
-                'id': problem_data.get('id', 'unknown'),
-                'original_text': problem_data.get('problem_text', ''),
-                'translated_text': problem_data.get('translated_text', ''),
-                'steps': problem_data.get('steps', []),
-                'hints': problem_data.get('hints', {}),
-                'difficulty': problem_data.get('difficulty_rating', 3),
-                'source': 'file_watcher'
+                'id': data.get('id', 'unknown'),
+                'original_text': data.get('problem_text', ''),
+                'translated_text': data.get('translated_text', ''),
+                'difficulty': data.get('difficulty_rating', 3),
+                'steps': data.get('steps', []),
+                'hints': data.get('hints', []),
+                'source': source
             }
-        else:
-            # From database
-            return problem_data
+        return {
+            'id': data['id'],
+            'original_text': data['original_text'],
+            'translated_text': data['translated_text'],
+            'difficulty': data['difficulty'],
+            'steps': [],
+            'hints': [],
+            'source': source
+        }
+        
+    def _refill_queue_from_database(self, batch: int = REFILL_BATCH):
+        """Prefetch a batch of uncompleted problems into the queue.
+        
+        One round trip per batch, selecting only the columns the widget
+        needs so no Problem entities are materialized.
+        """
+        # Only fetch what fits; extending a full deque would silently drop
+        # the problems at the front (newest from the file watcher)
+        batch = min(batch, self.problem_queue.maxlen - len(self.problem_queue))
+        if batch <= 0:
+            return
             
-    def _load_problem_from_database(self):
-        """Load a problem from database when queue is empty."""
+        # Don't re-queue problems that are already waiting or on screen
+        skip_ids = {p.get('id') for p in self.problem_queue}
+        if self.current_problem:
+            skip_ids.add(self.current_problem.get('id'))
+        skip_ids = [pid for pid in skip_ids if isinstance(pid, int)]
+        
         try:
             with self.db_manager.session_scope() as session:
                 # Get uncompleted problems
-                from src.database.models import Problem
-                problem = session.query(Problem).filter_by(
-                    is_completed=False
-                ).first()
+                rows = session.execute(
+                    _UNCOMPLETED_PROBLEMS_STMT,
+                    {'skip_ids': skip_ids, 'batch': batch}
+                )
+                
+                problems = [
+                    self._row_to_problem('database', row._mapping)
+                    for row in rows
+                ]
                 
-                if problem:
-                    problem_data = {
-                        'id': problem.id,
-                        'original_text': problem.original_text,
-                        'translated_text': problem.translated_text,
-                        'difficulty': problem.difficulty,
-                        'source': 'database'
-                    }
-                    self.load_problem(problem_data)
-                else:
-                    # No problems available
-                    self.show_notification(
-                        "No Problems Available",
-                        "Drop a PDF in the inbox folder to add new problems!",
-                        duration=5000
-                    )
+                # Resolve steps while the session is still open
+                self._attach_steps(session, problems)
+                self.problem_queue.extend(problems)
         except Exception as e:
             logger.error(f"Error loading from database: {e}")
             
+    @staticmethod
+    def _attach_steps(session, problems: List[Dict[str, Any]]):
+        """Fill in 'steps' (with per-step hints) on database problem dicts.
+        
+        Loads the steps and hints of every problem in two queries, however
+        many problems and steps there are.
+        """
+        if not problems:
+            return
+            
+        by_id = {p['id']: p for p in problems}
+        steps = session.execute(
+            _STEPS_FOR_PROBLEMS_STMT,
+            {'problem_ids': list(by_id)}
+        ).scalars()
+        for step in steps:
+            by_id[step.problem_id]['steps'].append({
+                'content': step.description,
+                'duration': step.time_estimate or 5,
+                'hints': [
+                    {'level': hint.level, 'content': hint.content}
+                    for hint in step.hints
+                ]
+            })
+            
     def _update_queue_display(self, queue_size: int):
         """Update UI elements showing queue status."""
+        sizes = (queue_size, self._processing_size)
+        if sizes == self._last_ui_queue:
+            return
+        self._last_ui_queue = sizes
+        
         self.queue_status_changed.emit(queue_size)
         self._update_window_title()
         
+    def _on_processing_size_changed(self, size: int):
+        """Cache the watcher's processing-queue size and refresh the title."""
+        self._processing_size = size
+        self._update_window_title()
+        
     def _update_window_title(self):
         """Update window title with queue status."""
         queue_size = len(self.problem_queue)
-        processing_size = self.file_watcher.get_queue_size()
         
         if queue_size > 0:
-            self.setWindowTitle(f"FocusQuest - {queue_size} problems ready")
-        elif processing_size > 0:
-            self.setWindowTitle(f"FocusQuest - Processing {processing_size} files...")
+            title = self.TITLE_READY.format(queue_size)
+        elif self._processing_size > 0:
+            title = self.TITLE_PROCESSING.format(self._processing_size)
         else:
-            self.setWindowTitle("FocusQuest - Drop PDFs in inbox folder")
+            title = self.TITLE_IDLE
+            
+        if title == self._last_title:
+            return
+        self._last_title = title
+        self.setWindowTitle(title)
             
     def _on_watcher_status_changed(self, status: str):
         """Handle file watcher status changes."""
@@ -184,8 +324,8 @@ class FocusQuestIntegratedWindow(FocusQuestWindow):
     def _on_watcher_error(self, error_msg: str):
         """Handle file watcher errors."""
         logger.error(f"File watcher error: {error_msg}")
-        if hasattr(self, 'show_notification'):
-            self.show_notification(
+        if self._notify:
+            self._notify(
                 "File Watcher Issue",
                 f"There was an issue with file monitoring: {error_msg}",
                 duration=5000
@@ -195,28 +335,25 @@ class FocusQuestIntegratedWindow(FocusQuestWindow):
             QMessageBox.warning(self, "File Watcher Issue", 
                               f"There was an issue with file monitoring: {error_msg}")
         
-    def _check_queue_status(self):
-        """Periodic check of queue status."""
-        # Update queue size display
-        self.file_watcher._update_queue_size()
+    def _on_break_started(self):
+        """Pause file processing while the user takes a break."""
+        self.file_watcher.pause_processing()
+        
+    def _on_break_ended(self):
+        """Resume file processing after a break."""
+        self.file_watcher.resume_processing()
         
-        # Check if we need to pause for break
-        if hasattr(self, 'session_manager') and self.session_manager.needs_break():
-            if not self.file_watcher.is_paused():
-                self.file_watcher.pause_processing()
-                
     def enter_panic_mode(self):
         """Pause file processing during panic mode."""
         # Set panic mode flag
         self.panic_mode_active = True
         
         # Pause file processing
-        if hasattr(self, 'file_watcher'):
-            self.file_watcher.pause_processing()
+        self.file_watcher.pause_processing()
             
         # Call parent method if it exists
-        if hasattr(super(), 'enter_panic_mode'):
-            super().enter_panic_mode()
+        if self._super_enter_panic:
+            self._super_enter_panic()
             
     def exit_panic_mode(self):
         """Resume file processing after panic mode."""
@@ -224,12 +361,11 @@ class FocusQuestIntegratedWindow(FocusQuestWindow):
         self.panic_mode_active = False
         
         # Resume file processing
-        if hasattr(self, 'file_watcher'):
-            self.file_watcher.resume_processing()
+        self.file_watcher.resume_processing()
             
         # Call parent method if it exists
-        if hasattr(super(), 'exit_panic_mode'):
-            super().exit_panic_mode()
+        if self._super_exit_panic:
+            self._super_exit_panic()
             
     def closeEvent(self, event):
         """Clean shutdown of file watcher."""
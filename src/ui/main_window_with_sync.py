@@ -1,13 +1,24 @@
 """Main window with full database synchronization."""
 import logging
 from typing import Optional
-from PyQt6.QtCore import pyqtSignal
+from PyQt6.QtCore import pyqtSignal, QTimer
+from PyQt6.QtWidgets import QMessageBox
+from sqlalchemy import select, bindparam
 
 from src.ui.main_window_integrated import FocusQuestIntegratedWindow
 from src.core.state_synchronizer import StateSynchronizer
+from src.database.models import Problem
 
 logger = logging.getLogger(__name__)
 
+# Column-only lookup, built once so the compiled form is cached
+_PROBLEM_BY_ID_STMT = select(
+    Problem.id,
+    Problem.original_text,
+    Problem.translated_text,
+    Problem.difficulty
+).where(Problem.id == bindparam('pid'))
+
 
 class FocusQuestSyncWindow(FocusQuestIntegratedWindow):
     """Main window with database state synchronization.
@@ -23,9 +34,12 @@ class FocusQuestSyncWindow(FocusQuestIntegratedWindow):
     # Additional signals
     user_stats_updated = pyqtSignal(dict)
     
-    def __init__(self):
+    # Coalesce bursts of step/hint events into one progress write
+    PROGRESS_FLUSH_DELAY_MS = 250
+    
+    def __init__(self, watch_interval: float = 30.0):
         """Initialize window with state sync."""
-        super().__init__()
+        super().__init__(watch_interval=watch_interval)
         
         # Initialize state synchronizer
         self.state_sync = StateSynchronizer(db_manager=self.db_manager)
@@ -35,6 +49,15 @@ class FocusQuestSyncWindow(FocusQuestIntegratedWindow):
         self.state_sync.state_loaded.connect(self._on_state_loaded)
         self.state_sync.sync_error.connect(self._on_sync_error)
         
+        # Hints used on the current problem
+        self._hints_used = 0
+        
+        # Debounced progress writes
+        self._pending_progress = {}
+        self._progress_flush_timer = QTimer(self)
+        self._progress_flush_timer.setSingleShot(True)
+        self._progress_flush_timer.timeout.connect(self._flush_progress)
+        
         # Initialize user and session
         self._initialize_user_session()
         
@@ -78,7 +101,6 @@ class FocusQuestSyncWindow(FocusQuestIntegratedWindow):
             problem_id = last_state['problem']['id']
             if problem_id:
                 # Show recovery dialog
-                from PyQt6.QtWidgets import QMessageBox
                 result = QMessageBox.question(
                     self,
                     "Resume Last Session?",
@@ -97,13 +119,11 @@ class FocusQuestSyncWindow(FocusQuestIntegratedWindow):
             self.problem_widget.step_completed.connect(self._on_step_completed)
             self.problem_widget.hint_used.connect(self._on_hint_used)
             
-        # Session events
-        if hasattr(self, 'session_manager'):
-            self.session_manager.break_started.connect(self._on_break_started)
-            self.session_manager.break_ended.connect(self._on_break_ended)
-            
     def load_problem(self, problem_data):
         """Override to track problem attempts."""
+        # Pending progress belongs to the previous attempt
+        self._flush_progress()
+        
         # Start problem attempt in database
         if 'id' in problem_data:
             attempt_id = self.state_sync.start_problem_attempt(problem_data['id'])
@@ -112,79 +132,67 @@ class FocusQuestSyncWindow(FocusQuestIntegratedWindow):
         # Call parent to load problem
         super().load_problem(problem_data)
         
-    def _calculate_xp_reward(self) -> int:
-        """Calculate XP reward based on performance."""
-        base_xp = 50  # Base XP for completion
-        
-        # Add bonuses
-        if hasattr(self, '_hints_used'):
-            # Bonus for using fewer hints
-            hints_penalty = self._hints_used * 5
-            base_xp = max(10, base_xp - hints_penalty)
-            
-        # Could add more bonuses for time, accuracy, etc.
-        return base_xp
-        
-    def on_problem_completed(self, problem_id: int):
-        """Override to save completion to database."""
-        # Calculate XP earned
-        xp_earned = self._calculate_xp_reward()
-        
-        # Save to database
-        self.state_sync.complete_problem(xp_earned)
-        
-        # Update user stats
-        stats = self.state_sync.get_user_stats()
-        self.user_stats_updated.emit(stats)
-        
-        # Call parent
-        super().on_problem_completed(problem_id)
+    def _advance(self, completed: bool):
+        """Record the outcome in the database, then load the next problem."""
+        self._flush_progress()
         
-    def skip_problem(self):
-        """Override to track skips in database."""
-        # Save skip to database
-        self.state_sync.skip_problem()
-        
-        # Call parent
-        super().skip_problem()
+        if completed:
+            # Save completion with earned XP
+            xp_earned = self._calculate_xp_reward()
+            self.state_sync.complete_problem(xp_earned)
+            
+            # Update user stats
+            stats = self.state_sync.get_user_stats()
+            self.user_stats_updated.emit(stats)
+        else:
+            # Only confirmed skips reach here
+            self.state_sync.skip_problem()
+            
+        # Reset before the next problem loads
+        self._hints_used = 0
+        super()._advance(completed)
         
     def _on_step_completed(self, step_index: int):
         """Handle step completion."""
-        # Update progress in database
-        self.state_sync.update_problem_progress(step=step_index)
+        # Update progress in database (debounced)
+        self._pending_progress['step'] = step_index
+        self._progress_flush_timer.start(self.PROGRESS_FLUSH_DELAY_MS)
         
     def _on_hint_used(self, hint_level: int):
         """Handle hint usage."""
-        # Get current hints used
-        current_hints = getattr(self, '_hints_used', 0) + 1
-        self._hints_used = current_hints
+        self._hints_used += 1
+        current_hints = self._hints_used
         
-        # Update in database
-        if hasattr(self, 'problem_widget'):
+        # Update in database (debounced)
+        if self.problem_widget is not None:
             step = self.problem_widget.current_step_index
-            self.state_sync.update_problem_progress(step=step, hints_used=current_hints)
+            self._pending_progress.update(step=step, hints_used=current_hints)
+            self._progress_flush_timer.start(self.PROGRESS_FLUSH_DELAY_MS)
+            
+    def _flush_progress(self):
+        """Write the latest pending step/hint progress in one update."""
+        self._progress_flush_timer.stop()
+        if not self._pending_progress:
+            return
+            
+        pending, self._pending_progress = self._pending_progress, {}
+        self.state_sync.update_problem_progress(**pending)
             
     def _on_break_started(self):
         """Handle break start."""
         # Pause file processing
-        if hasattr(self, 'file_watcher'):
-            self.file_watcher.pause_processing()
+        super()._on_break_started()
             
-        # Save current state
+        # Save current state, including debounced progress
+        self._flush_progress()
         self.state_sync.save_current_state()
         
-    def _on_break_ended(self):
-        """Handle break end."""
-        # Resume file processing
-        if hasattr(self, 'file_watcher'):
-            self.file_watcher.resume_processing()
-            
     def _calculate_xp_reward(self) -> int:
         """Calculate XP reward for problem completion."""
         base_xp = 50
         
         # Bonus for no hints
-        if not hasattr(self, '_hints_used') or self._hints_used == 0:
+        if self._hints_used == 0:
             base_xp += 20
             
         # Bonus for difficulty
@@ -192,27 +200,19 @@ class FocusQuestSyncWindow(FocusQuestIntegratedWindow):
             difficulty = self.current_problem.get('difficulty', 3)
             base_xp += (difficulty - 3) * 10
             
-        # Reset hints counter
-        self._hints_used = 0
-        
         return max(10, base_xp)  # Minimum 10 XP
         
     def _load_problem_by_id(self, problem_id: int):
         """Load specific problem from database."""
         try:
             with self.db_manager.session_scope() as session:
-                from src.database.models import Problem
-                problem = session.query(Problem).get(problem_id)
-                
-                if problem:
-                    problem_data = {
-                        'id': problem.id,
-                        'original_text': problem.original_text,
-                        'translated_text': problem.translated_text,
-                        'difficulty': problem.difficulty,
-                        'source': 'database'
-                    }
-                    self.load_problem(problem_data)
+                row = session.execute(_PROBLEM_BY_ID_STMT, {'pid': problem_id}).first()
+                if row:
+                    problem_data = self._row_to_problem('database', row._mapping)
+                    self._attach_steps(session, [problem_data])
+                    
+            if row:
+                self.load_problem(problem_data)
                     
         except Exception as e:
             logger.error(f"Error loading problem {problem_id}: {e}")
@@ -236,11 +236,14 @@ class FocusQuestSyncWindow(FocusQuestIntegratedWindow):
         
     def closeEvent(self, event):
         """Clean shutdown with state saving."""
-        # End session
-        self.state_sync.end_session()
+        # Write any debounced progress first
+        self._flush_progress()
         
-        # Save final state
-        self.state_sync.save_current_state()
+        # Save final state and end session
+        self.state_sync.finalize()
+        
+        # Call parent (stops the file watcher, which also uses the database)
+        super().closeEvent(event)
         
-        # Call parent
-        super().closeEvent(event)
\ No newline at end of file
+        # Don't leave database connections open after the window is gone
+        self.db_manager.dispose()
\ No newline at end of file
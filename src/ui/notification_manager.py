@@ -2,43 +2,105 @@
 ADHD-optimized notification manager for break suggestions and system alerts.
 Implements gentle, escalating notifications that respect user focus states.
 """
-import json
+import bisect
+import hashlib
+import heapq
+import itertools
+import math
 import platform
-from datetime import datetime, time
+import statistics
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields, replace
+from datetime import datetime
+from functools import lru_cache
+from time import monotonic
+from types import MappingProxyType
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, get_origin
 import logging
 
 from PyQt6.QtWidgets import QSystemTrayIcon, QMenu, QApplication
 from PyQt6.QtCore import QObject, QTimer, pyqtSignal, QSettings
-from PyQt6.QtGui import QIcon, QAction
-from PyQt6.QtMultimedia import QSoundEffect, QAudioOutput, QMediaPlayer
+from PyQt6.QtGui import QIcon, QAction, QActionGroup
 from PyQt6.QtCore import QUrl
 
-try:
-    from plyer import notification as desktop_notification
-    PLYER_AVAILABLE = True
-except ImportError:
-    PLYER_AVAILABLE = False
-    logging.warning("plyer not available - desktop notifications will be limited")
-
 logger = logging.getLogger(__name__)
 
+# plyer pulls in a platform notification backend, so it is imported on
+# first use: None = not tried yet, False = unavailable
+_plyer = None
+
+
+def _get_plyer():
+    """Return plyer's notification facade, or None if plyer is missing."""
+    global _plyer
+    if _plyer is None:
+        try:
+            from plyer import notification
+            _plyer = notification
+        except ImportError:
+            _plyer = False
+            logger.warning("plyer not available - desktop notifications will be limited")
+    return _plyer or None
+
+# Bundled assets, resolved once relative to the project rather than the CWD
+_ASSETS_DIR = Path(__file__).resolve().parents[2] / "assets"
+_TRAY_ICON_PATH = _ASSETS_DIR / "icons" / "focusquest_tray.png"
+_SOUND_FILES = MappingProxyType({
+    'gentle': _ASSETS_DIR / "sounds" / "gentle_chime.wav",
+    'standard': _ASSETS_DIR / "sounds" / "soft_bell.wav",
+    'prominent': _ASSETS_DIR / "sounds" / "attention_tone.wav"
+})
 
+# platform.system() name -> notification handler, resolved once at import
+_PLATFORM_HANDLERS = MappingProxyType({
+    'Windows': 'windows',
+    'Linux': 'linux',
+    'Darwin': 'macos'
+})
+_PLATFORM_HANDLER = _PLATFORM_HANDLERS.get(platform.system(), 'generic')
+logger.info(f"Platform notification handler: {_PLATFORM_HANDLER}")
+
+# Break message per energy level (1-5)
+_BASE_MESSAGES = MappingProxyType({
+    1: "Time for a gentle break! 🌱",
+    2: "You've been focused for a while - ready for a quick recharge? 🔋", 
+    3: "Your brain has earned a well-deserved break! 🧠✨",
+    4: "Amazing focus! Let's take a moment to recharge and celebrate. 🎉",
+    5: "Incredible work! Time to maintain that momentum with a energizing break. ⚡"
+})
+
+
+@lru_cache(maxsize=64)
+def _build_break_message(energy_level: int, medication_due: bool, breaks_today: int) -> str:
+    """Compose a break message (memoized; the same inputs recur all day)."""
+    message = _BASE_MESSAGES.get(energy_level, _BASE_MESSAGES[3])
+    
+    # Add medication reminder if applicable
+    if medication_due:
+        message += "\n\n💊 Friendly reminder: Medication time!"
+        
+    # Add encouragement based on break consistency
+    if breaks_today > 0:
+        message += f"\n\n🌟 Great job taking {breaks_today} breaks today!"
+        
+    return message
+
+
+@dataclass(slots=True)
 class NotificationSettings:
     """Settings for ADHD-optimized notifications."""
-    
-    def __init__(self):
-        self.audio_enabled = True
-        self.desktop_notifications_enabled = True
-        self.escalation_enabled = True
-        self.reminder_interval = 120  # seconds between gentle reminders
-        self.max_escalation_level = 3
-        self.hyperfocus_detection = True
-        self.medication_reminders = True
-        self.medication_times = ["08:00", "14:00"]  # Default medication times
-        self.energy_adaptive = True
-        self.gentle_mode = True  # Extra gentle for sensory sensitivity
+    audio_enabled: bool = True
+    desktop_notifications_enabled: bool = True
+    escalation_enabled: bool = True
+    reminder_interval: int = 120  # seconds between gentle reminders
+    max_escalation_level: int = 3
+    hyperfocus_detection: bool = True
+    medication_reminders: bool = True
+    medication_times: List[str] = field(default_factory=lambda: ["08:00", "14:00"])  # Default medication times
+    energy_adaptive: bool = True
+    gentle_mode: bool = True  # Extra gentle for sensory sensitivity
 
 
 class NotificationManager(QObject):
@@ -53,12 +115,46 @@ class NotificationManager(QObject):
     notification_dismissed = pyqtSignal(int)  # notification_level
     settings_requested = pyqtSignal()
     
-    def __init__(self, parent=None):
+    # No break for this long (seconds) is treated as hyperfocus
+    HYPERFOCUS_THRESHOLD_S = 7200.0
+    
+    # Minimum spacing of tray balloons
+    TRAY_THROTTLE_MS = 500
+    
+    # Identical notifications within this window are dropped; fingerprints
+    # older than the retention period are forgotten
+    NOTIFY_DEDUPE_S = 10.0
+    FINGERPRINT_RETENTION_S = 60.0
+    
+    # Distinct notification kinds held back during panic mode
+    MAX_QUEUED = 8
+    
+    # Settings edits are written once no change arrived for this long
+    SETTINGS_SAVE_DELAY_MS = 1000
+    
+    # Notification level -> (desktop title, tray title, body, timeout in s);
+    # {message} in the body is the current break suggestion
+    NOTIFICATION_LEVELS = {
+        1: ("FocusQuest Break Time 🧘", "Break Time 🧘", "{message}", 8),
+        2: ("Break Reminder 💙", "Break Reminder 💙",
+            "{message}\n\nYour focus session has been quite long! 💙", 12),
+        3: ("Self-Care Reminder 💜", "Self-Care Reminder 💜",
+            "Taking breaks is an important part of ADHD self-care! 💜\n\n"
+            "Even 2 minutes helps reset your focus. 🧘‍♀️", 15),
+    }
+    
+    # Notification level -> sound
+    SOUND_LEVELS = {1: 'gentle', 2: 'standard', 3: 'prominent'}
+    
+    def __init__(self, parent=None, settings_store=None):
         super().__init__(parent)
         
         # Core components
         self.settings = NotificationSettings()
+        # QSettings-like store (value/setValue/sync); None means the user's QSettings
+        self._settings_store = settings_store
         self.tray_icon: Optional[QSystemTrayIcon] = None
+        self._energy_group: Optional[QActionGroup] = None
         self.current_break_widget = None
         
         # Notification state
@@ -67,31 +163,51 @@ class NotificationManager(QObject):
         self.panic_mode_active = False
         self.user_energy_level = 3  # 1-5 scale
         self.last_notification_text = ""
-        self.queued_notifications = []
-        
-        # Timers
-        self.reminder_timer = QTimer(self)
-        self.reminder_timer.timeout.connect(self._show_gentle_reminder)
-        
-        self.break_timer = QTimer(self)
-        self.break_timer.timeout.connect(self._update_break_timer)
-        
-        self.escalation_timer = QTimer(self)
-        self.escalation_timer.timeout.connect(self.escalate_notification)
+        self.queued_notifications: OrderedDict[str, None] = OrderedDict()
+        
+        # Scheduler: one single-shot timer armed to the earliest deadline in
+        # a heap of [due, seq, callback], instead of one timer per purpose.
+        # Cancelled entries stay in the heap with callback None.
+        self._sched = []
+        self._sched_entries = {}  # callback -> its live heap entry
+        self._sched_seq = itertools.count()
+        self._tick = QTimer(self)
+        self._tick.setSingleShot(True)
+        self._tick.timeout.connect(self._run_due)
+        
+        # Tray message throttling and last tooltip set
+        self._pending_tray_message = None
+        self._tray_last_shown = float('-inf')
+        self._tray_tooltip = None
+        
+        # Fingerprint -> monotonic time last shown, for dropping repeats
+        self._recent_fingerprints: Dict[bytes, float] = {}
+        
+        # Unsaved settings changes (see update_settings); written on quit if
+        # the debounced save hasn't run yet
+        self._settings_dirty = False
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self._flush_settings)
         
         # Break tracking
         self.break_duration = 0
         self.break_time_remaining = 0
+        self._break_end = 0.0
+        
+        # Medication schedule as sorted minutes of the day, plus the last
+        # (minute, result) answer of _is_medication_time
+        self._med_times_key = None
+        self._med_minutes = []
+        self._med_cache = None
         self.breaks_today = 0
-        self.session_breaks = []
+        self.session_breaks = []  # monotonic timestamps of completed breaks
+        self.last_break_time: Optional[datetime] = None
+        self._last_break_monotonic: Optional[float] = None
         
         # Audio system
         self.audio_player = None
-        self.sound_files = {
-            'gentle': 'assets/sounds/gentle_chime.wav',
-            'standard': 'assets/sounds/soft_bell.wav', 
-            'prominent': 'assets/sounds/attention_tone.wav'
-        }
+        self.sound_files = dict(_SOUND_FILES)
         
         # Platform-specific handlers
         self.platform_handler = None
@@ -104,6 +220,53 @@ class NotificationManager(QObject):
         self.setup_system_tray()
         self.setup_audio()
     
+    def _schedule(self, ms: int, callback):
+        """Run callback once after ms milliseconds.
+        
+        Replaces any pending run of the same callback, like restarting a
+        QTimer would.
+        """
+        self._cancel(callback)
+        entry = [monotonic() + ms / 1000, next(self._sched_seq), callback]
+        self._sched_entries[callback] = entry
+        heapq.heappush(self._sched, entry)
+        self._arm()
+    
+    def _cancel(self, callback):
+        """Drop any pending run of callback.
+        
+        The heap entry is only marked dead; it is discarded when it
+        reaches the top of the heap.
+        """
+        entry = self._sched_entries.pop(callback, None)
+        if entry is not None:
+            entry[2] = None
+            self._arm()
+    
+    def _is_scheduled(self, callback) -> bool:
+        """Check whether callback has a pending run."""
+        return callback in self._sched_entries
+    
+    def _arm(self):
+        """Point the shared timer at the earliest pending deadline."""
+        while self._sched and self._sched[0][2] is None:
+            heapq.heappop(self._sched)
+        if not self._sched:
+            self._tick.stop()
+            return
+        delay = max(0, math.ceil((self._sched[0][0] - monotonic()) * 1000))
+        self._tick.start(delay)
+    
+    def _run_due(self):
+        """Run every callback whose deadline has passed, then re-arm."""
+        now = monotonic()
+        while self._sched and self._sched[0][0] <= now:
+            _, _, callback = heapq.heappop(self._sched)
+            if callback is not None:
+                del self._sched_entries[callback]
+                callback()
+        self._arm()
+    
     def setup_system_tray(self):
         """Initialize system tray icon with ADHD-friendly menu."""
         if not QSystemTrayIcon.isSystemTrayAvailable():
@@ -113,10 +276,9 @@ class NotificationManager(QObject):
         # Create tray icon
         self.tray_icon = QSystemTrayIcon(self)
         
-        # Set icon (you may need to adjust path)
-        icon_path = Path("assets/icons/focusquest_tray.png")
-        if icon_path.exists():
-            self.tray_icon.setIcon(QIcon(str(icon_path)))
+        # Set icon
+        if _TRAY_ICON_PATH.exists():
+            self.tray_icon.setIcon(QIcon(str(_TRAY_ICON_PATH)))
         else:
             # Fallback to app icon
             self.tray_icon.setIcon(QApplication.instance().style().standardIcon(QApplication.instance().style().StandardPixmap.SP_ComputerIcon))
@@ -144,9 +306,14 @@ class NotificationManager(QObject):
         
         # Energy level submenu
         energy_menu = menu.addMenu("Energy Level 🔋")
+        self._energy_group = QActionGroup(self)
+        self._energy_group.triggered.connect(lambda action: self.set_energy_level(action.data()))
         for level in range(1, 6):
             action = QAction(f"Level {level} {'⭐' * level}", self)
-            action.triggered.connect(lambda checked, l=level: self.set_energy_level(l))
+            action.setCheckable(True)
+            action.setChecked(level == self.user_energy_level)
+            action.setData(level)
+            self._energy_group.addAction(action)
             energy_menu.addAction(action)
         
         menu.addSeparator()
@@ -161,43 +328,149 @@ class NotificationManager(QObject):
         menu.addAction(quit_action)
         
         self.tray_icon.setContextMenu(menu)
-        self.tray_icon.setToolTip("FocusQuest - Study Session Active")
+        self._tray_menu = menu
+        self._tray_tooltip = None
+        self._set_tray_tooltip("FocusQuest - Study Session Active")
+        
+        # Break countdown is computed only when the user looks at it
+        self.tray_icon.activated.connect(lambda reason: self._update_break_timer())
+        menu.aboutToShow.connect(self._update_break_timer)
         
         # Show tray icon
         self.tray_icon.show()
         
         logger.info("System tray icon initialized")
     
-    def setup_audio(self):
-        """Initialize audio system for gentle notification sounds."""
+    def _show_tray_message(self, title: str, message: str, duration_ms: int):
+        """Show a tray balloon, throttled and de-duplicated.
+        
+        A message arriving within TRAY_THROTTLE_MS of the last one is held
+        back and only the latest held message is shown when the window
+        ends. A message already shown within NOTIFY_DEDUPE_S is dropped.
+        """
+        if not self.tray_icon:
+            return
+            
+        self._pending_tray_message = (title, message, duration_ms)
+        wait = self._tray_last_shown + self.TRAY_THROTTLE_MS / 1000 - monotonic()
+        if wait > 0:
+            if not self._is_scheduled(self._flush_tray_message):
+                self._schedule(math.ceil(wait * 1000), self._flush_tray_message)
+            return
+            
+        self._flush_tray_message()
+    
+    def _flush_tray_message(self):
+        """Show the pending tray balloon unless it repeats the last one."""
+        pending, self._pending_tray_message = self._pending_tray_message, None
+        if pending is None or not self.tray_icon:
+            return
+            
+        title, message, duration_ms = pending
+        if self._is_repeat('tray', title, message):
+            return
+            
+        self._tray_last_shown = monotonic()
+        self.tray_icon.showMessage(
+            title,
+            message,
+            QSystemTrayIcon.MessageIcon.Information,
+            duration_ms
+        )
+    
+    @staticmethod
+    def _fingerprint(channel: str, title: str, message: str) -> bytes:
+        """Short digest identifying a notification on one channel."""
+        h = hashlib.blake2b(digest_size=8)
+        h.update(channel.encode())
+        h.update(b'\0')
+        h.update(title.encode())
+        h.update(b'\0')
+        h.update(message.encode())
+        return h.digest()
+    
+    def _is_repeat(self, channel: str, title: str, message: str) -> bool:
+        """Check whether this notification was shown within NOTIFY_DEDUPE_S.
+        
+        Records the notification as shown when it is not a repeat.
+        """
+        fingerprint = self._fingerprint(channel, title, message)
+        now = monotonic()
+        last_shown = self._recent_fingerprints.get(fingerprint)
+        if last_shown is not None and now - last_shown < self.NOTIFY_DEDUPE_S:
+            return True
+            
+        cutoff = now - self.FINGERPRINT_RETENTION_S
+        self._recent_fingerprints = {
+            fp: shown for fp, shown in self._recent_fingerprints.items()
+            if shown >= cutoff
+        }
+        self._recent_fingerprints[fingerprint] = now
+        return False
+    
+    def _notify_desktop(self, title: str, message: str, timeout: int):
+        """Send a desktop notification through plyer, dropping repeats."""
+        plyer_notification = _get_plyer()
+        if not plyer_notification or self._is_repeat('desktop', title, message):
+            return
+            
         try:
-            # Create audio players for different notification levels
-            self.audio_player = {}
+            plyer_notification.notify(
+                title=title,
+                message=message,
+                app_name="FocusQuest",
+                timeout=timeout,
+            )
+        except Exception as e:
+            logger.warning(f"Desktop notification failed: {e}")
+    
+    def _set_tray_tooltip(self, text: str):
+        """Set the tray tooltip, skipping unchanged text."""
+        if not self.tray_icon or text == self._tray_tooltip:
+            return
+        self._tray_tooltip = text
+        self.tray_icon.setToolTip(text)
+    
+    def setup_audio(self):
+        """Initialize audio system for gentle notification sounds.
+        
+        Uses QSoundEffect (decoded PCM held in memory) and plays each sound
+        once muted, so the first real notification doesn't wait on decoding.
+        Nothing is loaded while audio is disabled, and QtMultimedia is only
+        imported once there is a sound file to load.
+        """
+        # Preloaded sound effects for different notification levels
+        self.audio_player = {}
+        if not self.settings.audio_enabled:
+            return
             
+        try:
             for level, sound_file in self.sound_files.items():
-                if Path(sound_file).exists():
-                    player = QMediaPlayer()
-                    player.setSource(QUrl.fromLocalFile(str(Path(sound_file).absolute())))
-                    self.audio_player[level] = player
+                sound_path = Path(sound_file)
+                if sound_path.exists():
+                    from PyQt6.QtMultimedia import QSoundEffect
+                    effect = QSoundEffect(self)
+                    effect.setSource(QUrl.fromLocalFile(str(sound_path.absolute())))
+                    
+                    # Warm-up play, silenced and cut short
+                    effect.setVolume(0.0)
+                    effect.play()
+                    QTimer.singleShot(100, lambda e=effect: self._finish_audio_warmup(e))
+                    
+                    self.audio_player[level] = effect
                     
         except Exception as e:
             logger.warning(f"Audio setup failed: {e}")
             self.audio_player = None
     
+    def _finish_audio_warmup(self, effect):
+        """Stop a muted warm-up play and restore normal volume."""
+        effect.stop()
+        effect.setVolume(1.0)
+    
     def setup_platform_notifications(self):
         """Setup platform-specific notification handlers."""
-        system = platform.system()
-        
-        if system == 'Windows':
-            self.platform_handler = 'windows'
-        elif system == 'Linux':
-            self.platform_handler = 'linux'
-        elif system == 'Darwin':
-            self.platform_handler = 'macos'
-        else:
-            self.platform_handler = 'generic'
-            
-        logger.info(f"Platform notification handler: {self.platform_handler}")
+        self.platform_handler = _PLATFORM_HANDLER
     
     def show_break_suggestion(self):
         """
@@ -206,7 +479,7 @@ class NotificationManager(QObject):
         """
         # Don't show notifications during panic mode
         if self.panic_mode_active:
-            self.queued_notifications.append('break_suggestion')
+            self._queue_notification('break_suggestion')
             return
             
         # Detect hyperfocus mode
@@ -224,11 +497,11 @@ class NotificationManager(QObject):
         if self.hyperfocus_mode:
             self._show_ultra_gentle_notification(message)
         else:
-            self._show_gentle_notification(message)
+            self._show_notification(1)
             
         # Setup escalation timer if enabled
         if self.settings.escalation_enabled:
-            self.escalation_timer.start(30000)  # 30 seconds
+            self._schedule(30000, self.escalate_notification)  # 30 seconds
             
         # Play audio if enabled
         if self.settings.audio_enabled:
@@ -238,61 +511,28 @@ class NotificationManager(QObject):
     
     def _create_break_message(self) -> str:
         """Create personalized break message based on user state."""
-        base_messages = {
-            1: "Time for a gentle break! 🌱",
-            2: "You've been focused for a while - ready for a quick recharge? 🔋", 
-            3: "Your brain has earned a well-deserved break! 🧠✨",
-            4: "Amazing focus! Let's take a moment to recharge and celebrate. 🎉",
-            5: "Incredible work! Time to maintain that momentum with a energizing break. ⚡"
-        }
-        
-        message = base_messages.get(self.user_energy_level, base_messages[3])
-        
-        # Add medication reminder if applicable
-        if self.settings.medication_reminders and self._is_medication_time():
-            message += "\n\n💊 Friendly reminder: Medication time!"
-            
-        # Add encouragement based on break consistency
-        if self.breaks_today > 0:
-            message += f"\n\n🌟 Great job taking {self.breaks_today} breaks today!"
-            
-        return message
+        medication_due = self.settings.medication_reminders and self._is_medication_time()
+        return _build_break_message(self.user_energy_level, medication_due, self.breaks_today)
     
-    def _show_gentle_notification(self, message: str):
-        """Show gentle desktop notification."""
-        if not self.settings.desktop_notifications_enabled:
-            return
+    def _show_notification(self, level: int):
+        """Show the desktop and tray notification for an escalation level."""
+        title, tray_title, template, timeout = self.NOTIFICATION_LEVELS[level]
+        message = template.format(message=self.last_notification_text)
+        
+        if self.settings.desktop_notifications_enabled:
+            self._notify_desktop(title, message, timeout)
             
-        if PLYER_AVAILABLE:
-            try:
-                desktop_notification.notify(
-                    title="FocusQuest Break Time 🧘",
-                    message=message,
-                    app_name="FocusQuest",
-                    timeout=8,  # Gentle timeout
-                )
-            except Exception as e:
-                logger.warning(f"Desktop notification failed: {e}")
-                
-        # Update tray icon to show break suggestion
-        if self.tray_icon:
-            self.tray_icon.showMessage(
-                "Break Time 🧘",
-                message,
-                QSystemTrayIcon.MessageIcon.Information,
-                8000  # 8 seconds
-            )
+        self._show_tray_message(tray_title, message, timeout * 1000)
     
     def _show_ultra_gentle_notification(self, message: str):
         """Show extra gentle notification for hyperfocus protection."""
         # Even more subtle for hyperfocus mode
         if self.tray_icon:
-            self.tray_icon.setToolTip(f"Break suggested: {message}")
+            self._set_tray_tooltip(f"Break suggested: {message}")
             # Very brief, non-intrusive tray message
-            self.tray_icon.showMessage(
+            self._show_tray_message(
                 "Gentle break reminder",
                 "When you're ready 🌱",
-                QSystemTrayIcon.MessageIcon.Information,
                 3000  # Very brief
             )
     
@@ -302,79 +542,30 @@ class NotificationManager(QObject):
             return
             
         if self.notification_level >= self.settings.max_escalation_level:
-            self.escalation_timer.stop()
+            self._cancel(self.escalate_notification)
             return
             
         self.notification_level += 1
         
         # Show escalated notification
-        if self.notification_level == 2:
-            self._show_standard_notification()
-        elif self.notification_level == 3:
-            self._show_prominent_notification()
+        if self.notification_level in self.NOTIFICATION_LEVELS:
+            self._show_notification(self.notification_level)
             
         # Play escalated audio
         if self.settings.audio_enabled:
             self.play_notification_sound(level=self.notification_level)
             
-        # Continue escalation timer
-        self.escalation_timer.start(60000)  # 1 minute intervals
+        # Continue escalation
+        self._schedule(60000, self.escalate_notification)  # 1 minute intervals
         
         logger.info(f"Notification escalated to level {self.notification_level}")
     
-    def _show_standard_notification(self):
-        """Show standard intensity notification."""
-        message = self.last_notification_text + "\n\nYour focus session has been quite long! 💙"
-        
-        if PLYER_AVAILABLE:
-            try:
-                desktop_notification.notify(
-                    title="Break Reminder 💙",
-                    message=message,
-                    app_name="FocusQuest",
-                    timeout=12,
-                )
-            except Exception:
-                pass
-                
-        if self.tray_icon:
-            self.tray_icon.showMessage(
-                "Break Reminder 💙",
-                message,
-                QSystemTrayIcon.MessageIcon.Information,
-                12000
-            )
-    
-    def _show_prominent_notification(self):
-        """Show prominent notification as final escalation."""
-        message = "Taking breaks is an important part of ADHD self-care! 💜\n\nEven 2 minutes helps reset your focus. 🧘‍♀️"
-        
-        if PLYER_AVAILABLE:
-            try:
-                desktop_notification.notify(
-                    title="Self-Care Reminder 💜",
-                    message=message,
-                    app_name="FocusQuest",
-                    timeout=15,
-                )
-            except Exception:
-                pass
-                
-        if self.tray_icon:
-            self.tray_icon.showMessage(
-                "Self-Care Reminder 💜",
-                message,
-                QSystemTrayIcon.MessageIcon.Information,
-                15000
-            )
-    
     def play_notification_sound(self, level: int):
         """Play gentle audio notification based on level."""
         if not self.settings.audio_enabled or not self.audio_player:
             return
             
-        sound_map = {1: 'gentle', 2: 'standard', 3: 'prominent'}
-        sound_type = sound_map.get(level, 'gentle')
+        sound_type = self.SOUND_LEVELS.get(level, 'gentle')
         
         if sound_type in self.audio_player:
             try:
@@ -387,28 +578,25 @@ class NotificationManager(QObject):
         self.notification_dismissed.emit(self.notification_level)
         
         # Reset escalation
-        self.escalation_timer.stop()
+        self._cancel(self.escalate_notification)
         self.notification_level = 0
         
         # Schedule gentle reminder if not in hyperfocus mode
         if not self.hyperfocus_mode:
             reminder_delay = self.settings.reminder_interval * 1000
-            self.reminder_timer.start(reminder_delay)
+            self._schedule(reminder_delay, self._show_gentle_reminder)
             
         logger.info("Notification dismissed, gentle reminder scheduled")
     
     def _show_gentle_reminder(self):
         """Show gentle reminder after dismissal."""
-        self.reminder_timer.stop()
-        
         # Show very gentle reminder
         message = "Just a gentle reminder when you're ready! 🌸"
         
         if self.tray_icon:
-            self.tray_icon.showMessage(
+            self._show_tray_message(
                 "When you're ready 🌸",
                 message,
-                QSystemTrayIcon.MessageIcon.Information,
                 5000
             )
     
@@ -416,28 +604,39 @@ class NotificationManager(QObject):
         """Start break countdown timer."""
         self.break_duration = duration
         self.break_time_remaining = duration
-        self.break_timer.start(1000)  # Update every second
+        self._break_end = monotonic() + duration
+        self._schedule(duration * 1000, self._break_completed)
+        self._update_break_timer()
         
         logger.info(f"Break timer started for {duration} seconds")
     
-    def _update_break_timer(self):
-        """Update break countdown timer."""
-        self.break_time_remaining -= 1
+    def _update_break_timer(self, elapsed: Optional[float] = None):
+        """Refresh the break countdown (on tray activation or menu open).
+        
+        elapsed is the seconds since the break started; by default it is
+        read from the clock.
+        """
+        if not self._break_end:
+            return
+            
+        if elapsed is None:
+            elapsed = monotonic() - (self._break_end - self.break_duration)
+        self.break_time_remaining = max(0, math.ceil(self.break_duration - elapsed))
         
         # Update tray icon tooltip with countdown
         if self.tray_icon:
             minutes = self.break_time_remaining // 60
             seconds = self.break_time_remaining % 60
-            self.tray_icon.setToolTip(f"Break time: {minutes:02d}:{seconds:02d} remaining")
-            
-        # Break time finished
-        if self.break_time_remaining <= 0:
-            self.break_timer.stop()
-            self._break_completed()
+            self._set_tray_tooltip(f"Break time: {minutes:02d}:{seconds:02d} remaining")
     
     def _break_completed(self):
         """Handle break completion."""
+        self._break_end = 0.0
+        self.break_time_remaining = 0
         self.breaks_today += 1
+        self._last_break_monotonic = monotonic()
+        self.session_breaks.append(self._last_break_monotonic)
+        self.last_break_time = datetime.now()
         self.break_taken.emit(self.break_duration // 60)  # Convert to minutes
         
         # Award XP for taking break
@@ -446,21 +645,21 @@ class NotificationManager(QObject):
         
         # Show completion message
         if self.tray_icon:
-            self.tray_icon.showMessage(
+            self._show_tray_message(
                 "Break Complete! 🎉",
                 f"Great job taking care of yourself! +{xp_gained} XP",
-                QSystemTrayIcon.MessageIcon.Information,
                 5000
             )
-            self.tray_icon.setToolTip("FocusQuest - Ready to continue!")
+            self._set_tray_tooltip("FocusQuest - Ready to continue!")
             
         logger.info(f"Break completed, awarded {xp_gained} XP")
     
     def on_break_taken(self):
         """Handle when user takes a break."""
-        self.escalation_timer.stop()
-        self.reminder_timer.stop()
+        self._cancel(self.escalate_notification)
+        self._cancel(self._show_gentle_reminder)
         self.notification_level = 0
+        self._last_break_monotonic = monotonic()
         
         # Start break timer (default 5 minutes)
         self.start_break_timer(300)
@@ -473,11 +672,11 @@ class NotificationManager(QObject):
         # Could use typing patterns, mouse activity, time since last break, etc.
         
         # For now, simple heuristic: if no breaks for > 2 hours, assume hyperfocus
-        if len(self.session_breaks) == 0 or \
-           (datetime.now() - self.session_breaks[-1]).total_seconds() > 7200:
-            self.hyperfocus_mode = True
-        else:
-            self.hyperfocus_mode = False
+        last_break = self._last_break_monotonic
+        self.hyperfocus_mode = (
+            last_break is None or
+            monotonic() - last_break > self.HYPERFOCUS_THRESHOLD_S
+        )
             
         logger.debug(f"Hyperfocus mode: {self.hyperfocus_mode}")
     
@@ -486,25 +685,46 @@ class NotificationManager(QObject):
         if not self.settings.medication_reminders:
             return False
             
-        current_time = datetime.now().time()
-        current_str = current_time.strftime("%H:%M")
-        
-        # Check if within 30 minutes of medication time
-        for med_time_str in self.settings.medication_times:
-            med_time = datetime.strptime(med_time_str, "%H:%M").time()
+        # Re-parse only if the schedule was changed
+        if tuple(self.settings.medication_times) != self._med_times_key:
+            self._parse_medication_times()
             
-            # Simple 30-minute window check
-            med_minutes = med_time.hour * 60 + med_time.minute
-            current_minutes = current_time.hour * 60 + current_time.minute
+        now = datetime.now()
+        current_minutes = now.hour * 60 + now.minute
+        if self._med_cache and self._med_cache[0] == current_minutes:
+            return self._med_cache[1]
             
-            if abs(med_minutes - current_minutes) <= 30:
-                return True
-                
-        return False
+        # Check if within 30 minutes of the nearest medication times
+        i = bisect.bisect_left(self._med_minutes, current_minutes)
+        result = any(
+            abs(med_minutes - current_minutes) <= 30
+            for med_minutes in self._med_minutes[max(0, i - 1):i + 1]
+        )
+        
+        self._med_cache = (current_minutes, result)
+        return result
+    
+    def _parse_medication_times(self):
+        """Parse "HH:MM" medication times into sorted minutes of the day."""
+        self._med_times_key = tuple(self.settings.medication_times)
+        self._med_cache = None
+        
+        minutes = []
+        for med_time_str in self._med_times_key:
+            try:
+                med_time = datetime.strptime(med_time_str, "%H:%M").time()
+            except ValueError:
+                logger.warning(f"Ignoring invalid medication time: {med_time_str!r}")
+                continue
+            minutes.append(med_time.hour * 60 + med_time.minute)
+            
+        self._med_minutes = sorted(minutes)
     
     def set_energy_level(self, level: int):
         """Set user's current energy level (1-5)."""
         self.user_energy_level = max(1, min(5, level))
+        if self._energy_group is not None:
+            self._energy_group.actions()[self.user_energy_level - 1].setChecked(True)
         logger.info(f"Energy level set to {self.user_energy_level}")
     
     def set_panic_mode(self, active: bool):
@@ -512,11 +732,19 @@ class NotificationManager(QObject):
         self.panic_mode_active = active
         
         if not active and self.queued_notifications:
-            # Process queued notifications after panic mode
-            for notification in self.queued_notifications:
+            # Process queued notifications after panic mode, once per kind
+            queued = list(self.queued_notifications)
+            self.queued_notifications.clear()
+            for notification in queued:
                 if notification == 'break_suggestion':
                     self.show_break_suggestion()
-            self.queued_notifications.clear()
+    
+    def _queue_notification(self, kind: str):
+        """Hold a notification until panic mode ends, newest last."""
+        self.queued_notifications[kind] = None
+        self.queued_notifications.move_to_end(kind)
+        while len(self.queued_notifications) > self.MAX_QUEUED:
+            self.queued_notifications.popitem(last=False)
     
     def get_break_statistics(self) -> Dict:
         """Get break-taking statistics for insights."""
@@ -527,7 +755,7 @@ class NotificationManager(QObject):
             'total_session_breaks': total_breaks,
             'break_consistency': self._calculate_break_consistency(),
             'average_session_length': self._calculate_average_session_length(),
-            'last_break': self.session_breaks[-1] if self.session_breaks else None
+            'last_break': self.last_break_time
         }
         
         return stats
@@ -553,23 +781,14 @@ class NotificationManager(QObject):
             return 0.0
             
         # Simple consistency based on regular intervals
-        intervals = []
-        for i in range(1, len(self.session_breaks)):
-            interval = (self.session_breaks[i] - self.session_breaks[i-1]).total_seconds()
-            intervals.append(interval)
-            
-        if not intervals:
-            return 0.0
-            
-        # Calculate coefficient of variation (lower = more consistent)
-        mean_interval = sum(intervals) / len(intervals)
-        variance = sum((x - mean_interval) ** 2 for x in intervals) / len(intervals)
-        std_dev = variance ** 0.5
+        intervals = [b - a for a, b in itertools.pairwise(self.session_breaks)]
         
+        # Calculate coefficient of variation (lower = more consistent)
+        mean_interval = statistics.fmean(intervals)
         if mean_interval == 0:
             return 0.0
             
-        cv = std_dev / mean_interval
+        cv = statistics.pstdev(intervals, mean_interval) / mean_interval
         consistency = max(0.0, 1.0 - cv)  # Invert so higher = more consistent
         
         return consistency
@@ -579,13 +798,8 @@ class NotificationManager(QObject):
         if len(self.session_breaks) < 2:
             return 0
             
-        total_time = (self.session_breaks[-1] - self.session_breaks[0]).total_seconds()
-        num_sessions = len(self.session_breaks) - 1
-        
-        if num_sessions == 0:
-            return 0
-            
-        average_seconds = total_time / num_sessions
+        total_time = self.session_breaks[-1] - self.session_breaks[0]
+        average_seconds = total_time / (len(self.session_breaks) - 1)
         return int(average_seconds / 60)  # Convert to minutes
     
     def _manual_break_request(self):
@@ -594,8 +808,8 @@ class NotificationManager(QObject):
     
     def _skip_break(self):
         """Handle break skip request."""
-        self.escalation_timer.stop()
-        self.reminder_timer.stop()
+        self._cancel(self.escalate_notification)
+        self._cancel(self._show_gentle_reminder)
         self.notification_level = 0
         
         # Award small XP for conscious decision
@@ -603,36 +817,73 @@ class NotificationManager(QObject):
         
         logger.info("Break skipped by user")
     
+    def replace_settings(self, **overrides) -> NotificationSettings:
+        """Return a copy of the current settings with the given fields changed."""
+        return replace(self.settings, **overrides)
+    
+    def update_settings(self, **changes):
+        """Change notification settings; saved once edits pause."""
+        for name, value in changes.items():
+            if not hasattr(self.settings, name):
+                raise AttributeError(f"Unknown notification setting: {name}")
+            setattr(self.settings, name, value)
+            
+        if 'audio_enabled' in changes:
+            # Load sounds on demand, release them when audio is turned off
+            if self.settings.audio_enabled and not self.audio_player:
+                self.setup_audio()
+            elif not self.settings.audio_enabled:
+                for effect in (self.audio_player or {}).values():
+                    effect.deleteLater()
+                self.audio_player = {}
+                
+        self._settings_dirty = True
+        self._schedule(self.SETTINGS_SAVE_DELAY_MS, self._flush_settings)
+    
+    def _flush_settings(self):
+        """Save settings if they changed since the last save."""
+        if self._settings_dirty:
+            self.save_settings()
+    
+    @contextmanager
+    def suppress_signals(self):
+        """Block this manager's signals for a batch of state changes."""
+        was_blocked = self.blockSignals(True)
+        try:
+            yield self
+        finally:
+            self.blockSignals(was_blocked)
+    
+    def _open_settings(self):
+        """Return the store notification settings are kept in."""
+        if self._settings_store is not None:
+            return self._settings_store
+        return QSettings("FocusQuest", "NotificationManager")
+    
     def save_settings(self):
         """Save notification settings to persistent storage."""
-        settings = QSettings("FocusQuest", "NotificationManager")
-        
-        settings.setValue("audio_enabled", self.settings.audio_enabled)
-        settings.setValue("desktop_notifications_enabled", self.settings.desktop_notifications_enabled)
-        settings.setValue("escalation_enabled", self.settings.escalation_enabled)
-        settings.setValue("reminder_interval", self.settings.reminder_interval)
-        settings.setValue("max_escalation_level", self.settings.max_escalation_level)
-        settings.setValue("hyperfocus_detection", self.settings.hyperfocus_detection)
-        settings.setValue("medication_reminders", self.settings.medication_reminders)
-        settings.setValue("medication_times", self.settings.medication_times)
-        settings.setValue("energy_adaptive", self.settings.energy_adaptive)
-        settings.setValue("gentle_mode", self.settings.gentle_mode)
+        self._cancel(self._flush_settings)
+        self._settings_dirty = False
+        
+        settings = self._open_settings()
+        for setting in fields(self.settings):
+            settings.setValue(setting.name, getattr(self.settings, setting.name))
+        settings.sync()
         
         logger.info("Notification settings saved")
     
     def load_settings(self):
         """Load notification settings from persistent storage."""
-        settings = QSettings("FocusQuest", "NotificationManager")
-        
-        self.settings.audio_enabled = settings.value("audio_enabled", True, type=bool)
-        self.settings.desktop_notifications_enabled = settings.value("desktop_notifications_enabled", True, type=bool)
-        self.settings.escalation_enabled = settings.value("escalation_enabled", True, type=bool)
-        self.settings.reminder_interval = settings.value("reminder_interval", 120, type=int)
-        self.settings.max_escalation_level = settings.value("max_escalation_level", 3, type=int)
-        self.settings.hyperfocus_detection = settings.value("hyperfocus_detection", True, type=bool)
-        self.settings.medication_reminders = settings.value("medication_reminders", True, type=bool)
-        self.settings.medication_times = settings.value("medication_times", ["08:00", "14:00"], type=list)
-        self.settings.energy_adaptive = settings.value("energy_adaptive", True, type=bool)
-        self.settings.gentle_mode = settings.value("gentle_mode", True, type=bool)
+        settings = self._open_settings()
+        
+        defaults = NotificationSettings()
+        
+        for setting in fields(defaults):
+            value_type = get_origin(setting.type) or setting.type
+            setattr(self.settings, setting.name, settings.value(
+                setting.name, getattr(defaults, setting.name), type=value_type
+            ))
+        
+        self._parse_medication_times()
         
         logger.info("Notification settings loaded")
\ No newline at end of file
@@ -3,11 +3,16 @@ Problem display widget with ADHD-optimized step-by-step presentation
 """
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-    QCheckBox, QTextEdit, QScrollArea, QFrame
+    QCheckBox, QScrollArea, QFrame, QStyle, QStyleOption
 )
-from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QPropertyAnimation, QEasingCurve
-from PyQt6.QtGui import QFont
-from typing import List, Dict
+from PyQt6.QtCore import Qt, QTimer, QElapsedTimer, QEvent, QPointF, pyqtSignal
+from PyQt6.QtGui import QPainter, QStaticText, QTransform
+from typing import List, Dict, Optional
+
+from src.ui.styles import get_font, set_style_flag
+
+# Shared duration captions for the common step lengths
+_DURATION_LABELS = {d: f"~{d} min" for d in range(1, 61)}
 
 
 class StepWidget(QFrame):
@@ -39,14 +44,12 @@ class StepWidget(QFrame):
         self.content_label = QLabel(self.step_data.get('content', ''))
         self.content_label.setWordWrap(True)
         self.content_label.setObjectName("stepContent")
-        font = QFont()
-        font.setPointSize(14)
-        self.content_label.setFont(font)
+        self.content_label.setFont(get_font(14))
         layout.addWidget(self.content_label, stretch=1)
         
         # Duration indicator
         duration = self.step_data.get('duration', 5)
-        self.duration_label = QLabel(f"~{duration} min")
+        self.duration_label = QLabel(_DURATION_LABELS.get(duration) or f"~{duration} min")
         self.duration_label.setObjectName("durationLabel")
         layout.addWidget(self.duration_label)
         
@@ -55,7 +58,77 @@ class StepWidget(QFrame):
         if state == Qt.CheckState.Checked.value:
             self.completed.emit(self.index)
             # Visual feedback
-            self.setStyleSheet("#stepWidget { background-color: #2d4a2d; }")
+            set_style_flag(self, "completed", True)
+
+
+class TimerLabel(QLabel):
+    """Step timer label drawn from pre-built QStaticText pieces
+
+    "Time: M:SS" is painted as a per-minute prefix plus one of sixty
+    prepared seconds strings. A tick only schedules a repaint: the label's
+    own text is a fixed-width placeholder set once, so QLabel never redoes
+    its size hint or layout and no new text is shaped each second.
+    """
+    
+    # Sizes the label for timers up to 99:59
+    _WIDTH_TEMPLATE = "Time: 00:00"
+    
+    def __init__(self, minutes: int = 0, seconds: int = 0):
+        super().__init__(self._WIDTH_TEMPLATE)
+        self._minutes = minutes
+        self._seconds = seconds
+        self._prepare_texts()
+        
+    def _prepared(self, text: str) -> QStaticText:
+        static = QStaticText(text)
+        static.setTextFormat(Qt.TextFormat.PlainText)
+        static.prepare(QTransform(), self.font())
+        return static
+        
+    def _prepare_texts(self):
+        self._second_texts = [self._prepared(f"{s:02d}") for s in range(60)]
+        self._minute_texts: Dict[int, QStaticText] = {}
+        
+    def _minute_text(self, minutes: int) -> QStaticText:
+        static = self._minute_texts.get(minutes)
+        if static is None:
+            static = self._minute_texts[minutes] = self._prepared(f"Time: {minutes}:")
+        return static
+        
+    def set_time(self, minutes: int, seconds: int):
+        """Show minutes:seconds, repainting only if it changed"""
+        if (minutes, seconds) != (self._minutes, self._seconds):
+            self._minutes = minutes
+            self._seconds = seconds
+            self.update()
+        
+    def text(self) -> str:
+        return f"Time: {self._minutes}:{self._seconds:02d}"
+        
+    def changeEvent(self, event):
+        if event.type() == QEvent.Type.FontChange:
+            self._prepare_texts()
+        super().changeEvent(event)
+        
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        
+        # Background, border and padding from the theme
+        option = QStyleOption()
+        option.initFrom(self)
+        self.style().drawPrimitive(QStyle.PrimitiveElement.PE_Widget, option, painter, self)
+        
+        prefix = self._minute_text(self._minutes)
+        seconds = self._second_texts[self._seconds]
+        prefix_size = prefix.size()
+        width = prefix_size.width() + seconds.size().width()
+        rect = self.contentsRect()
+        x = rect.x() + (rect.width() - width) / 2
+        y = rect.y() + (rect.height() - prefix_size.height()) / 2
+        painter.setFont(self.font())
+        painter.setPen(self.palette().color(self.foregroundRole()))
+        painter.drawStaticText(QPointF(x, y), prefix)
+        painter.drawStaticText(QPointF(x + prefix_size.width(), y), seconds)
 
 
 class ProblemWidget(QWidget):
@@ -72,6 +145,8 @@ class ProblemWidget(QWidget):
         self.current_hint_level = 0
         self.step_widgets: List[StepWidget] = []
         self.timer_paused = False
+        self.hint_frame: Optional[QFrame] = None  # Built on first hint
+        self.hint_label: Optional[QLabel] = None
         self.init_ui()
         self.show_current_step()
         
@@ -91,26 +166,10 @@ class ProblemWidget(QWidget):
         self.problem_label.setText(problem_text)
         
         # Large font for problem
-        font = QFont()
-        font.setPointSize(16)
-        font.setBold(True)
-        self.problem_label.setFont(font)
+        self.problem_label.setFont(get_font(16, bold=True))
         
         layout.addWidget(self.problem_label)
         
-        # Hint area (initially hidden)
-        self.hint_frame = QFrame()
-        self.hint_frame.setObjectName("hintFrame")
-        self.hint_frame.hide()
-        
-        hint_layout = QVBoxLayout(self.hint_frame)
-        self.hint_label = QLabel()
-        self.hint_label.setWordWrap(True)
-        self.hint_label.setObjectName("hintText")
-        hint_layout.addWidget(self.hint_label)
-        
-        layout.addWidget(self.hint_frame)
-        
         # Steps area
         self.steps_scroll = QScrollArea()
         self.steps_scroll.setWidgetResizable(True)
@@ -120,29 +179,47 @@ class ProblemWidget(QWidget):
         self.steps_layout = QVBoxLayout(self.steps_container)
         self.steps_layout.setSpacing(10)
         
-        # Create step widgets
+        # Create step widgets, laid out once at the end rather than per step
         steps = self.problem_data.get('steps', [])
+        self.steps_container.setUpdatesEnabled(False)
         for i, step in enumerate(steps):
             step_widget = StepWidget(step, i)
-            step_widget.completed.connect(self.on_step_completed)
+            # Queued so the checkbox click returns before completion runs
+            step_widget.completed.connect(
+                self.on_step_completed, Qt.ConnectionType.QueuedConnection
+            )
             step_widget.hide()  # Initially hidden
             self.step_widgets.append(step_widget)
             self.steps_layout.addWidget(step_widget)
             
         self.steps_layout.addStretch()
+        self.steps_container.setUpdatesEnabled(True)
         self.steps_scroll.setWidget(self.steps_container)
         layout.addWidget(self.steps_scroll, stretch=1)
         
         # Timer for current step
-        self.timer_label = QLabel("Time: 0:00")
+        self.timer_label = TimerLabel()
         self.timer_label.setObjectName("timerLabel")
-        self.timer_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(self.timer_label)
         
-        # Setup timer
+        # Setup timer: the clock measures, the QTimer only refreshes the label
         self.step_timer = QTimer()
         self.step_timer.timeout.connect(self.update_timer)
-        self.elapsed_time = 0
+        self._step_clock = QElapsedTimer()
+        self._elapsed_before_pause_ms = 0
+        self._timer_warned = False
+        
+    @property
+    def elapsed_time(self) -> int:
+        """Seconds spent on the current step, excluding paused time"""
+        running_ms = self._step_clock.elapsed() if self._step_clock.isValid() else 0
+        return (self._elapsed_before_pause_ms + running_ms) // 1000
+    
+    @elapsed_time.setter
+    def elapsed_time(self, seconds: int):
+        self._elapsed_before_pause_ms = seconds * 1000
+        if self._step_clock.isValid():
+            self._step_clock.restart()
         
     def show_current_step(self):
         """Show only the current step"""
@@ -162,7 +239,12 @@ class ProblemWidget(QWidget):
             self.steps_scroll.ensureWidgetVisible(current_widget)
             
             # Reset timer
-            self.elapsed_time = 0
+            self._elapsed_before_pause_ms = 0
+            self._step_clock.start()
+            if self._timer_warned:
+                self._timer_warned = False
+                set_style_flag(self.timer_label, "overtime", False)
+            self.update_timer()
             self.step_timer.start(1000)  # Update every second
             
             # Fade in animation
@@ -181,14 +263,20 @@ class ProblemWidget(QWidget):
             self.show_current_step()
             # Reset hint level for new step
             self.current_hint_level = 0
-            self.hint_frame.hide()
+            if self.hint_frame is not None:
+                self.hint_frame.hide()
             
     def show_hint(self):
         """Show the next hint level"""
+        # Database problems carry hints per step
         hints = self.problem_data.get('hints', [])
+        if self.current_step < len(self.step_widgets):
+            hints = self.step_widgets[self.current_step].step_data.get('hints', hints)
         
         if self.current_hint_level < len(hints):
             hint = hints[self.current_hint_level]
+            if self.hint_frame is None:
+                self._create_hint_frame()
             self.hint_label.setText(f"Hint {hint['level']}: {hint['content']}")
             self.hint_frame.show()
             self.current_hint_level += 1
@@ -196,6 +284,20 @@ class ProblemWidget(QWidget):
             # Animate hint appearance
             self._animate_widget_opacity(self.hint_frame)
             
+    def _create_hint_frame(self):
+        """Build the hint area below the problem text"""
+        self.hint_frame = QFrame()
+        self.hint_frame.setObjectName("hintFrame")
+        
+        hint_layout = QVBoxLayout(self.hint_frame)
+        self.hint_label = QLabel()
+        self.hint_label.setWordWrap(True)
+        self.hint_label.setObjectName("hintText")
+        hint_layout.addWidget(self.hint_label)
+        
+        # Directly under the problem label
+        self.layout().insertWidget(1, self.hint_frame)
+            
     def submit_current_step(self):
         """Submit/complete the current step"""
         if self.current_step < len(self.step_widgets):
@@ -222,24 +324,29 @@ class ProblemWidget(QWidget):
             
     def update_timer(self):
         """Update the step timer display"""
-        self.elapsed_time += 1
-        minutes = self.elapsed_time // 60
-        seconds = self.elapsed_time % 60
-        self.timer_label.setText(f"Time: {minutes}:{seconds:02d}")
+        elapsed = self.elapsed_time
+        self.timer_label.set_time(*divmod(elapsed, 60))
         
         # Check if taking too long (ADHD consideration)
+        if self._timer_warned:
+            return
         expected_duration = self.step_widgets[self.current_step].step_data.get('duration', 5) * 60
-        if self.elapsed_time > expected_duration * 1.5:
+        if elapsed > expected_duration * 1.5:
             # Taking 50% longer than expected - maybe show encouragement
-            self.timer_label.setStyleSheet("color: #ff9944;")  # Orange warning
+            self._timer_warned = True
+            set_style_flag(self.timer_label, "overtime", True)  # Orange warning
     
     def pause_timer(self):
         """Pause the step timer (for panic mode)"""
         self.timer_paused = True
         self.step_timer.stop()
+        if self._step_clock.isValid():
+            self._elapsed_before_pause_ms += self._step_clock.elapsed()
+            self._step_clock.invalidate()
         
     def resume_timer(self):
         """Resume the step timer after panic mode"""
         if self.timer_paused:
             self.timer_paused = False
+            self._step_clock.start()
             self.step_timer.start(1000)
\ No newline at end of file
@@ -1,7 +1,7 @@
 """
 Session management with ADHD-friendly break reminders
 """
-from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from PyQt6.QtCore import QObject, QTimer, QElapsedTimer, pyqtSignal
 from PyQt6.QtWidgets import QMessageBox
 from datetime import datetime, timedelta
 from typing import Optional
@@ -17,10 +17,14 @@ class SessionManager(QObject):
     def __init__(self, break_interval: int = 25):
         super().__init__()
         self.break_interval = break_interval  # Minutes
+        # Wakes up once per break instead of ticking every second
         self.session_timer = QTimer()
+        self.session_timer.setSingleShot(True)
         self.session_timer.timeout.connect(self.check_session_time)
         self.session_start_time: Optional[datetime] = None
-        self.session_time = 0  # Seconds
+        self._session_clock = QElapsedTimer()
+        self._time_before_pause_ms = 0
+        self._next_break_at = 0  # Session seconds
         self.problems_completed = 0
         self.problems_skipped = 0  # Track strategic skips
         self.xp_earned = 0
@@ -28,21 +32,40 @@ class SessionManager(QObject):
     def start_session(self):
         """Start a new study session"""
         self.session_start_time = datetime.now()
-        self.session_time = 0
+        self._time_before_pause_ms = 0
+        self._session_clock.start()
+        self._next_break_at = self.break_interval * 60
         self.problems_completed = 0
         self.problems_skipped = 0
         self.xp_earned = 0
-        self.session_timer.start(1000)  # Check every second
+        self._schedule_break_check()
         self.session_started.emit()
         
+    @property
+    def session_time(self) -> int:
+        """Seconds of active (unpaused) study in this session"""
+        running_ms = self._session_clock.elapsed() if self._session_clock.isValid() else 0
+        return (self._time_before_pause_ms + running_ms) // 1000
+    
+    @session_time.setter
+    def session_time(self, seconds: int):
+        self._time_before_pause_ms = seconds * 1000
+        if self._session_clock.isValid():
+            self._session_clock.restart()
+            self._schedule_break_check()
+        
     def pause_session(self):
         """Pause the current session"""
         self.session_timer.stop()
+        if self._session_clock.isValid():
+            self._time_before_pause_ms += self._session_clock.elapsed()
+            self._session_clock.invalidate()
         
     def resume_session(self):
         """Resume the paused session"""
-        if self.session_start_time:
-            self.session_timer.start(1000)
+        if self.session_start_time and not self._session_clock.isValid():
+            self._session_clock.start()
+            self._schedule_break_check()
             
     def end_session(self):
         """End the current session"""
@@ -59,15 +82,27 @@ class SessionManager(QObject):
             self.session_ended.emit(stats)
             
         self.session_start_time = None
+        self._session_clock.invalidate()
+        
+    def _schedule_break_check(self):
+        """Arm the timer for the next break boundary"""
+        remaining_ms = self._next_break_at * 1000 - (
+            self._time_before_pause_ms + self._session_clock.elapsed())
+        self.session_timer.start(max(0, remaining_ms))
         
     def check_session_time(self):
         """Check if it's time for a break"""
-        self.session_time += 1
+        interval = self.break_interval * 60
+        elapsed = self.session_time
         
         # Check for break time
-        if self.session_time > 0 and self.session_time % (self.break_interval * 60) == 0:
+        if elapsed >= self._next_break_at:
+            self._next_break_at = (elapsed // interval + 1) * interval
             self.suggest_break()
             
+        if self._session_clock.isValid():
+            self._schedule_break_check()
+            
     def suggest_break(self):
         """Suggest taking a break"""
         self.break_suggested.emit()
@@ -1,14 +1,27 @@
 """
 XP and progress tracking widget with gamification elements
 """
+import bisect
 from PyQt6.QtWidgets import (
     QWidget, QHBoxLayout, QVBoxLayout, QLabel, 
     QProgressBar, QGraphicsOpacityEffect
 )
-from PyQt6.QtCore import Qt, QTimer, QPropertyAnimation, pyqtSignal, QRect
-from PyQt6.QtGui import QFont
+from PyQt6.QtCore import Qt, QTimer, QPropertyAnimation, QEasingCurve, pyqtSignal
 from typing import Optional
 
+from src.ui.styles import get_font
+
+# Title earned at each level threshold, ascending
+_LEVEL_THRESHOLDS = (1, 5, 10, 15, 20, 25)
+_LEVEL_TITLES = (
+    "Novice Mathematician",
+    "Problem Solver",
+    "Equation Expert",
+    "Calculus Champion",
+    "Math Master",
+    "Grand Mathematician"
+)
+
 
 class XPWidget(QWidget):
     """Display XP, level, and streak information"""
@@ -34,12 +47,21 @@ class XPWidget(QWidget):
         
         self.level_label = QLabel("Level 1")
         self.level_label.setObjectName("levelLabel")
-        font = QFont()
-        font.setPointSize(18)
-        font.setBold(True)
-        self.level_label.setFont(font)
+        self.level_label.setFont(get_font(18, bold=True))
         level_container.addWidget(self.level_label)
         
+        # Level-up flash; the effect only renders offscreen while enabled
+        self._level_effect = QGraphicsOpacityEffect(self.level_label)
+        self._level_effect.setEnabled(False)
+        self.level_label.setGraphicsEffect(self._level_effect)
+        
+        self.opacity_anim = QPropertyAnimation(self._level_effect, b"opacity", self)
+        self.opacity_anim.setDuration(1000)
+        self.opacity_anim.setKeyValueAt(0, 1.0)
+        self.opacity_anim.setKeyValueAt(0.5, 0.3)
+        self.opacity_anim.setKeyValueAt(1.0, 1.0)
+        self.opacity_anim.finished.connect(lambda: self._level_effect.setEnabled(False))
+        
         self.level_title = QLabel("Novice Mathematician")
         self.level_title.setObjectName("levelTitle")
         level_container.addWidget(self.level_title)
@@ -61,8 +83,14 @@ class XPWidget(QWidget):
         self.xp_bar.setValue(0)
         self.xp_bar.setTextVisible(False)
         self.xp_bar.setMinimumWidth(200)
+        self.xp_bar.valueChanged.connect(self._on_xp_value_changed)
         xp_container.addWidget(self.xp_bar)
         
+        # XP gain animation, driven by Qt rather than per-frame Python timers
+        self._xp_anim = QPropertyAnimation(self.xp_bar, b"value", self)
+        self._xp_anim.setDuration(500)
+        self._xp_anim.setEasingCurve(QEasingCurve.Type.OutCubic)
+        
         layout.addLayout(xp_container)
         
         # Streak display
@@ -71,9 +99,7 @@ class XPWidget(QWidget):
         
         self.streak_label = QLabel("🔥 0 day streak")
         self.streak_label.setObjectName("streakLabel")
-        font = QFont()
-        font.setPointSize(14)
-        self.streak_label.setFont(font)
+        self.streak_label.setFont(get_font(14))
         streak_container.addWidget(self.streak_label)
         
         self.streak_bonus = QLabel("")
@@ -87,6 +113,7 @@ class XPWidget(QWidget):
     def set_xp(self, current: int, maximum: int):
         """Set current XP within level"""
         self.current_xp = current
+        self._xp_anim.stop()
         self.xp_bar.setMaximum(maximum)
         self.xp_bar.setValue(current)
         self.xp_label.setText(f"XP: {current} / {maximum}")
@@ -107,22 +134,14 @@ class XPWidget(QWidget):
             
     def animate_xp_gain(self, start: int, end: int):
         """Animate XP bar filling"""
-        # Simple animation - could be enhanced with QPropertyAnimation
-        steps = 10
-        increment = (end - start) / steps
-        
-        def update_step(step):
-            if step <= steps and hasattr(self, 'xp_bar'):
-                try:
-                    value = int(start + increment * step)
-                    self.xp_bar.setValue(value)
-                    self.xp_label.setText(f"XP: {value} / {self.xp_bar.maximum()}")
-                    QTimer.singleShot(50, lambda: update_step(step + 1))
-                except RuntimeError:
-                    # Widget was deleted during animation
-                    pass
-                
-        update_step(1)
+        self._xp_anim.stop()
+        self._xp_anim.setStartValue(start)
+        self._xp_anim.setEndValue(end)
+        self._xp_anim.start()
+        
+    def _on_xp_value_changed(self, value: int):
+        """Keep the XP label in step with the bar"""
+        self.xp_label.setText(f"XP: {value} / {self.xp_bar.maximum()}")
         
     def trigger_level_up(self, overflow_xp: int):
         """Handle level up event"""
@@ -149,20 +168,8 @@ class XPWidget(QWidget):
         
     def get_level_title(self, level: int) -> str:
         """Get title for level"""
-        titles = {
-            1: "Novice Mathematician",
-            5: "Problem Solver",
-            10: "Equation Expert",
-            15: "Calculus Champion",
-            20: "Math Master",
-            25: "Grand Mathematician"
-        }
-        
-        # Find appropriate title
-        for lvl in sorted(titles.keys(), reverse=True):
-            if level >= lvl:
-                return titles[lvl]
-        return "Student"
+        i = bisect.bisect_right(_LEVEL_THRESHOLDS, level) - 1
+        return _LEVEL_TITLES[i] if i >= 0 else "Student"
         
     def set_streak(self, days: int):
         """Set current streak"""
@@ -179,14 +186,8 @@ class XPWidget(QWidget):
     def play_level_up_animation(self):
         """Play level up animation"""
         # Flash the level label
-        effect = QGraphicsOpacityEffect()
-        self.level_label.setGraphicsEffect(effect)
-        
-        self.opacity_anim = QPropertyAnimation(effect, b"opacity")
-        self.opacity_anim.setDuration(1000)
-        self.opacity_anim.setKeyValueAt(0, 1.0)
-        self.opacity_anim.setKeyValueAt(0.5, 0.3)
-        self.opacity_anim.setKeyValueAt(1.0, 1.0)
+        self.opacity_anim.stop()
+        self._level_effect.setEnabled(True)
         self.opacity_anim.start()
         
         # Could also show a popup or particle effect
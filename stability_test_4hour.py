@@ -3,16 +3,18 @@
 4-Hour Stability Test for ADHD Hyperfocus Sessions
 Tests the system under extended use conditions
 """
-import time
 import psutil
-import threading
 import logging
+from array import array
+from itertools import cycle
 from datetime import datetime, timedelta
 import os
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.main_with_watcher import FocusQuestApp
+from PyQt6.QtCore import QTimer
+
+from src.main_with_watcher import FocusQuestAppWithWatcher as FocusQuestApp
 from src.database.db_manager import DatabaseManager
 
 logging.basicConfig(
@@ -24,52 +26,66 @@ logging.basicConfig(
     ]
 )
 
+def _summarize_metrics(memory_mb, cpu_percent):
+    """Return (start, peak, final memory, average CPU, peak CPU).
+    
+    Columns are typed arrays, so max() and sum() run in C without
+    creating Python objects for each row.
+    """
+    return (
+        memory_mb[0],
+        max(memory_mb),
+        memory_mb[-1],
+        sum(cpu_percent) / len(cpu_percent),
+        max(cpu_percent),
+    )
+
+
 class StabilityTest:
     def __init__(self):
         self.start_time = datetime.now()
         self.end_time = self.start_time + timedelta(hours=4)
-        self.metrics = []
+        # One typed column per metric, one row per sample
+        self.timestamps = []
+        self.memory_mb = array('d')
+        self.cpu_percent = array('d')
+        self.num_threads = array('i')
+        self.num_fds = array('i')
         self.app = None
-        self.monitoring = True
-        
-    def collect_metrics(self):
-        """Collect system metrics every minute"""
-        while self.monitoring:
-            process = psutil.Process()
-            metrics = {
-                'timestamp': datetime.now().isoformat(),
-                'memory_mb': process.memory_info().rss / 1024 / 1024,
-                'cpu_percent': process.cpu_percent(interval=1),
-                'num_threads': process.num_threads(),
-                'num_fds': process.num_fds() if hasattr(process, 'num_fds') else 0,
-            }
-            self.metrics.append(metrics)
-            logging.info(f"Metrics: Memory={metrics['memory_mb']:.1f}MB, CPU={metrics['cpu_percent']:.1f}%")
-            
-            # Check for memory leaks
-            if metrics['memory_mb'] > 600:
-                logging.warning(f"High memory usage: {metrics['memory_mb']}MB")
-                
-            time.sleep(60)  # Collect every minute
-    
-    def simulate_user_activity(self):
-        """Simulate realistic ADHD user behavior"""
-        activities = [
+        self.activities = cycle([
             self.load_pdf,
             self.solve_problems,
             self.take_break,
             self.skip_problem,
             self.use_panic_button,
             self.check_achievements,
-        ]
+        ])
+        self.process = psutil.Process()
+        # First call only sets the baseline for non-blocking cpu_percent()
+        self.process.cpu_percent(interval=None)
+        
+    def collect_metrics_once(self):
+        """Take a single metrics sample (fired every minute)"""
+        process = self.process
+        memory_mb = process.memory_info().rss / 1024 / 1024
+        cpu_percent = process.cpu_percent(interval=None)  # Since last sample
+        self.timestamps.append(datetime.now().isoformat())
+        self.memory_mb.append(memory_mb)
+        self.cpu_percent.append(cpu_percent)
+        self.num_threads.append(process.num_threads())
+        self.num_fds.append(process.num_fds() if hasattr(process, 'num_fds') else 0)
+        logging.info(f"Metrics: Memory={memory_mb:.1f}MB, CPU={cpu_percent:.1f}%")
         
-        while datetime.now() < self.end_time:
-            for activity in activities:
-                try:
-                    activity()
-                    time.sleep(300)  # 5 minutes between activities
-                except Exception as e:
-                    logging.error(f"Activity failed: {e}")
+        # Check for memory leaks
+        if memory_mb > 600:
+            logging.warning(f"High memory usage: {memory_mb}MB")
+    
+    def next_activity(self):
+        """Simulate the next step of realistic ADHD user behavior"""
+        try:
+            next(self.activities)()
+        except Exception as e:
+            logging.error(f"Activity failed: {e}")
                     
     def load_pdf(self):
         """Simulate loading a PDF"""
@@ -82,9 +98,8 @@ class StabilityTest:
         # Click through problem steps
         
     def take_break(self):
-        """Simulate break"""
+        """Simulate break (lasts until the next activity fires)"""
         logging.info("Simulating break...")
-        time.sleep(300)  # 5 minute break
         
     def skip_problem(self):
         """Simulate skipping"""
@@ -105,31 +120,34 @@ class StabilityTest:
         """Run the 4-hour test"""
         logging.info("Starting 4-hour stability test")
         
-        # Start monitoring thread
-        monitor_thread = threading.Thread(target=self.collect_metrics)
-        monitor_thread.start()
-        
-        # Start application
+        # Start application (creates the QApplication the timers run on)
         self.app = FocusQuestApp()
         
-        # Simulate user activity
-        activity_thread = threading.Thread(target=self.simulate_user_activity)
-        activity_thread.start()
+        # Everything runs on the Qt event loop, no helper threads
+        self.monitor_timer = QTimer(interval=60000, timeout=self.collect_metrics_once)
+        self.activity_timer = QTimer(interval=300000, timeout=self.next_activity)
+        self.collect_metrics_once()
+        self.monitor_timer.start()
+        self.activity_timer.start()
         
-        # Wait for test completion
-        while datetime.now() < self.end_time:
-            time.sleep(60)
-            
-        # Stop monitoring
-        self.monitoring = False
-        monitor_thread.join()
-        activity_thread.join()
+        # End the test after 4 hours
+        duration_ms = int((self.end_time - datetime.now()).total_seconds() * 1000)
+        QTimer.singleShot(duration_ms, self.finish)
+        
+        return self.app.start()
         
-        # Generate report
+    def finish(self):
+        """Stop sampling, write the report and quit the event loop"""
+        self.monitor_timer.stop()
+        self.activity_timer.stop()
         self.generate_report()
+        self.app.shutdown()
         
     def generate_report(self):
         """Generate stability test report"""
+        start_mb, peak_mb, final_mb, avg_cpu, peak_cpu = _summarize_metrics(
+            self.memory_mb, self.cpu_percent
+        )
         report = f"""
 4-HOUR STABILITY TEST REPORT
 ============================
@@ -138,21 +156,21 @@ End Time: {datetime.now()}
 Duration: 4 hours
 
 MEMORY ANALYSIS:
-- Starting Memory: {self.metrics[0]['memory_mb']:.1f}MB
-- Peak Memory: {max(m['memory_mb'] for m in self.metrics):.1f}MB
-- Final Memory: {self.metrics[-1]['memory_mb']:.1f}MB
-- Memory Growth: {self.metrics[-1]['memory_mb'] - self.metrics[0]['memory_mb']:.1f}MB
+- Starting Memory: {start_mb:.1f}MB
+- Peak Memory: {peak_mb:.1f}MB
+- Final Memory: {final_mb:.1f}MB
+- Memory Growth: {final_mb - start_mb:.1f}MB
 
 CPU ANALYSIS:
-- Average CPU: {sum(m['cpu_percent'] for m in self.metrics) / len(self.metrics):.1f}%
-- Peak CPU: {max(m['cpu_percent'] for m in self.metrics):.1f}%
+- Average CPU: {avg_cpu:.1f}%
+- Peak CPU: {peak_cpu:.1f}%
 
 STABILITY:
 - Crashes: 0
 - Errors: Check stability_test_4hour.log
 - Recovery Tests: Passed
 
-RECOMMENDATION: {'PASS' if self.metrics[-1]['memory_mb'] < 600 else 'FAIL - Memory leak detected'}
+RECOMMENDATION: {'PASS' if final_mb < 600 else 'FAIL - Memory leak detected'}
 """
         
         with open('stability_test_report.txt', 'w') as f:
@@ -0,0 +1,36 @@
+"""Shared pytest fixtures for FocusQuest tests."""
+import sys
+from unittest.mock import MagicMock
+
+import pytest
+
+
+@pytest.fixture(scope="session", autouse=True)
+def qapp():
+    """Create the QApplication once for the whole test session.
+    
+    Qt is imported here rather than at module level so suites that don't
+    need it (analyzer, circuit breaker) still run without PyQt6.
+    """
+    try:
+        from PyQt6.QtWidgets import QApplication
+    except ImportError:
+        yield None
+        return
+    app = QApplication.instance() or QApplication(sys.argv)
+    yield app
+
+
+@pytest.fixture(scope="module")
+def stub_system_tray():
+    """Replace the notification tray icon class for a whole test module.
+    
+    Each construction returns a fresh MagicMock, so per-test assertions on
+    the tray icon don't see calls from earlier tests.
+    """
+    import src.ui.notification_manager as notification_manager
+    
+    tray_class = MagicMock(side_effect=lambda *args, **kwargs: MagicMock())
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(notification_manager, 'QSystemTrayIcon', tray_class)
+        yield tray_class
@@ -1,32 +1,70 @@
 """Test break notification system for ADHD-optimized interruptions."""
+import platform
+import sys
 import pytest
-import time
+from datetime import datetime
 from unittest.mock import Mock, patch, MagicMock
-from PyQt6.QtWidgets import QApplication, QSystemTrayIcon
-from PyQt6.QtCore import QTimer, pyqtSignal
+from PyQt6.QtWidgets import QSystemTrayIcon
+from PyQt6.QtCore import QTimer, QSettings, pyqtSignal
 from PyQt6.QtTest import QTest
-import sys
-
-# Ensure QApplication exists for tests
-if not QApplication.instance():
-    app = QApplication(sys.argv)
 
 from src.ui.session_manager import SessionManager
-from src.ui.notification_manager import NotificationManager
+from src.ui.notification_manager import (
+    NotificationManager, NotificationSettings, _PLATFORM_HANDLERS
+)
 from src.ui.break_notification_widget import BreakNotificationWidget
 
 
+class RecordingStub:
+    """Lightweight stand-in that records every method call as (name, args, kwargs)."""
+    
+    def __init__(self):
+        self.calls = []
+        
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+
+class MemorySettings(dict):
+    """In-memory settings store with the QSettings calls NotificationManager uses."""
+    
+    def setValue(self, key, value):
+        self[key] = value
+        
+    def value(self, key, default=None, type=None):
+        return self.get(key, default)
+        
+    def sync(self):
+        pass
+
+
+# Tray icons are MagicMocks for every test in this module
+pytestmark = pytest.mark.usefixtures("stub_system_tray")
+
+
+@pytest.fixture(scope="module")
+def break_widget(qapp):
+    """Break widget shared by tests that only read its static content."""
+    widget = BreakNotificationWidget()
+    yield widget
+    widget.deleteLater()
+
+
 class TestBreakNotificationSystem:
     """Test ADHD-optimized break notification system."""
     
     @pytest.fixture
-    def notification_manager(self):
+    def notification_manager(self, tmp_path):
         """Create notification manager with mocked dependencies."""
-        with patch('src.ui.notification_manager.QSystemTrayIcon'):
-            manager = NotificationManager()
-            manager.system_tray = Mock()
-            manager.desktop_notifications = Mock()
-            return manager
+        # Keep saved settings out of the real user config
+        QSettings.setPath(QSettings.Format.NativeFormat, QSettings.Scope.UserScope, str(tmp_path))
+        manager = NotificationManager()
+        with manager.suppress_signals():
+            manager.system_tray = RecordingStub()
+            manager.desktop_notifications = RecordingStub()
+        yield manager
+        # Drop callbacks still scheduled (e.g. a pending settings save)
+        manager._tick.stop()
     
     @pytest.fixture
     def session_manager(self):
@@ -44,29 +82,46 @@ class TestBreakNotificationSystem:
         notification_manager.tray_icon.setIcon.assert_called_once()
         notification_manager.tray_icon.setToolTip.assert_called_with("FocusQuest - Study Session Active")
     
-    def test_gentle_break_notification_escalation(self, notification_manager):
-        """Test escalating notification system for ADHD users."""
-        # Mock the notification methods
-        notification_manager.show_break_suggestion = Mock()
-        notification_manager.escalate_notification = Mock()
+    def test_energy_menu_is_exclusive(self, notification_manager):
+        """Test that the tray energy menu selects exactly one level."""
+        notification_manager.setup_system_tray()
+        actions = notification_manager._energy_group.actions()
+        assert [a.isChecked() for a in actions] == [False, False, True, False, False]
         
-        # Test escalation levels
-        notification_manager.notification_level = 1
-        notification_manager.show_break_suggestion()
-        notification_manager.show_break_suggestion.assert_called_once()
+        actions[3].trigger()
+        assert notification_manager.user_energy_level == 4
+        assert [a.data() for a in actions if a.isChecked()] == [4]
         
-        # Test level escalation
-        notification_manager.notification_level = 2
-        notification_manager.escalate_notification()
-        notification_manager.escalate_notification.assert_called_once()
+        notification_manager.set_energy_level(1)
+        assert [a.data() for a in actions if a.isChecked()] == [1]
+    
+    @pytest.mark.parametrize(("steps", "expected_level"), [
+        (1, 1),  # Starts gentle
+        (2, 2),
+        (3, 3),
+        (4, 3),  # Stops at the maximum level
+    ])
+    def test_gentle_break_notification_escalation(self, notification_manager, steps, expected_level):
+        """Test escalating notification system for ADHD users."""
+        notification_manager.settings = notification_manager.replace_settings(
+            hyperfocus_detection=False, audio_enabled=False)
         
-        # Verify max escalation
-        notification_manager.notification_level = 3
-        assert notification_manager.notification_level == 3
+        with patch.object(notification_manager, '_show_notification') as mock_show:
+            notification_manager.show_break_suggestion()
+            for _ in range(steps - 1):
+                notification_manager.escalate_notification()
+            
+            assert notification_manager.notification_level == expected_level
+            mock_show.assert_called_with(expected_level)
+            assert mock_show.call_count == expected_level
+            
+        # Escalation keeps going until the maximum level is reached
+        assert notification_manager._is_scheduled(notification_manager.escalate_notification) \
+            == (steps <= notification_manager.settings.max_escalation_level)
     
-    def test_break_widget_adhd_optimizations(self):
+    def test_break_widget_adhd_optimizations(self, break_widget):
         """Test that break widget follows ADHD design principles."""
-        widget = BreakNotificationWidget()
+        widget = break_widget
         
         # Should have calming colors (background gradient)
         assert "background" in widget.styleSheet()
@@ -80,82 +135,256 @@ class TestBreakNotificationSystem:
         assert widget.continue_btn.text() == "Just 5 more minutes 💪"
         assert "⚙️" in widget.settings_btn.text()
     
+    @pytest.mark.slow
+    def test_tray_messages_throttled_and_deduplicated(self, notification_manager):
+        """Test that bursts collapse and repeats are not re-shown."""
+        notification_manager.tray_icon = Mock()
+        show = notification_manager.tray_icon.showMessage
+        
+        notification_manager._show_tray_message("Break", "first", 5000)
+        notification_manager._show_tray_message("Break", "second", 5000)
+        notification_manager._show_tray_message("Break", "third", 5000)
+        
+        # Leading message right away, only the latest of the burst later
+        assert show.call_count == 1
+        QTest.qWait(notification_manager.TRAY_THROTTLE_MS + 100)
+        assert [c.args[1] for c in show.call_args_list] == ["first", "third"]
+        
+        # Same message again shortly after is dropped
+        QTest.qWait(notification_manager.TRAY_THROTTLE_MS + 100)
+        notification_manager._show_tray_message("Break", "third", 5000)
+        assert show.call_count == 2
+    
+    def test_desktop_notification_repeats_suppressed(self, notification_manager):
+        """Test that the same desktop notification is sent once per window."""
+        with patch('src.ui.notification_manager._plyer') as mock_notify:
+            notification_manager._notify_desktop("Break Reminder 💙", "Stretch?", 12)
+            notification_manager._notify_desktop("Break Reminder 💙", "Stretch?", 12)
+            notification_manager._notify_desktop("Break Reminder 💙", "Water?", 12)
+            assert mock_notify.notify.call_count == 2
+            
+            # Allowed again once the window has passed
+            fingerprint = notification_manager._fingerprint('desktop', "Break Reminder 💙", "Stretch?")
+            notification_manager._recent_fingerprints[fingerprint] -= notification_manager.NOTIFY_DEDUPE_S
+            notification_manager._notify_desktop("Break Reminder 💙", "Stretch?", 12)
+            assert mock_notify.notify.call_count == 3
+    
+    def test_escalation_levels_share_one_path(self, notification_manager):
+        """Test that each level's notification comes from the level table."""
+        notification_manager.last_notification_text = "Time to stretch!"
+        notification_manager.settings.desktop_notifications_enabled = False
+        
+        with patch.object(notification_manager, '_notify_desktop') as mock_desktop, \
+                patch.object(notification_manager, '_show_tray_message') as mock_tray:
+            notification_manager._show_notification(2)
+            
+            mock_desktop.assert_not_called()
+            title, message, duration_ms = mock_tray.call_args.args
+            assert title == "Break Reminder 💙"
+            assert message.startswith("Time to stretch!\n\n")
+            assert duration_ms == 12000
+            
+            notification_manager.settings.desktop_notifications_enabled = True
+            notification_manager._show_notification(3)
+            assert mock_desktop.call_args.args[0] == "Self-Care Reminder 💜"
+            assert mock_desktop.call_args.args[2] == 15
+    
     def test_break_timer_functionality(self, notification_manager):
         """Test break countdown timer works correctly."""
         notification_manager.start_break_timer(duration=5)  # 5 seconds for testing
         
-        assert notification_manager.break_timer.isActive()
+        # One wake-up at the end of the break, no per-second ticks
+        assert notification_manager._is_scheduled(notification_manager._break_completed)
+        assert len(notification_manager._sched_entries) == 1
         assert notification_manager.break_duration == 5
         
-        # Test timer countdown
+        # Test timer countdown without waiting in real time
         initial_remaining = notification_manager.break_time_remaining
-        time.sleep(1)
-        notification_manager._update_break_timer()
+        notification_manager._update_break_timer(elapsed=1.0)
         
         assert notification_manager.break_time_remaining < initial_remaining
+        assert notification_manager.break_time_remaining == 4
+        
+        # Never counts below zero
+        notification_manager._update_break_timer(elapsed=10.0)
+        assert notification_manager.break_time_remaining == 0
+    
+    @pytest.mark.slow
+    def test_scheduler_runs_due_callbacks_in_order(self, notification_manager):
+        """Test that one shared timer drives all scheduled callbacks."""
+        calls = []
+        first = lambda: calls.append('first')
+        second = lambda: calls.append('second')
+        
+        notification_manager._schedule(40, second)
+        notification_manager._schedule(10, first)
+        assert notification_manager._tick.isActive()
+        
+        QTest.qWait(100)
+        
+        assert calls == ['first', 'second']
+        assert not notification_manager._tick.isActive()
+    
+    @pytest.mark.slow
+    def test_rescheduled_callback_runs_once(self, notification_manager):
+        """Test that cancelled or replaced runs never fire."""
+        calls = []
+        callback = lambda: calls.append('run')
+        dropped = lambda: calls.append('dropped')
+        
+        notification_manager._schedule(10, dropped)
+        notification_manager._schedule(10, callback)
+        notification_manager._schedule(30, callback)
+        notification_manager._cancel(dropped)
+        assert not notification_manager._is_scheduled(dropped)
+        
+        QTest.qWait(100)
+        
+        assert calls == ['run']
+        assert not notification_manager._sched
+    
+    def test_dismissal_swaps_escalation_for_reminder(self, notification_manager):
+        """Test that dismissing stops escalation and schedules a reminder."""
+        notification_manager.hyperfocus_mode = False
+        notification_manager._schedule(30000, notification_manager.escalate_notification)
+        
+        notification_manager.on_notification_dismissed()
+        
+        assert not notification_manager._is_scheduled(notification_manager.escalate_notification)
+        assert notification_manager._is_scheduled(notification_manager._show_gentle_reminder)
+    
+    def test_signals_suppressed_during_batch_changes(self, notification_manager):
+        """Test that state changes inside suppress_signals notify nobody."""
+        dismissed = []
+        notification_manager.notification_dismissed.connect(dismissed.append)
+        
+        with notification_manager.suppress_signals():
+            notification_manager.on_notification_dismissed()
+        assert dismissed == []
+        
+        notification_manager.on_notification_dismissed()
+        assert dismissed == [0]
+    
+    def test_break_completes_after_duration(self, notification_manager):
+        """Test that the break ends on its own and awards XP."""
+        awarded = []
+        notification_manager.achievement_unlocked.connect(
+            lambda name, xp: awarded.append(name))
+        
+        notification_manager.start_break_timer(duration=0)
+        QTest.qWait(50)
+        
+        assert awarded == ["Self-Care Champion"]
+        assert notification_manager.breaks_today == 1
+        assert notification_manager.break_time_remaining == 0
     
     def test_audio_notification_customization(self, notification_manager):
         """Test audio notifications can be customized for ADHD sensitivity."""
-        # Mock audio player
-        notification_manager.audio_player = {'gentle': Mock(), 'standard': Mock()}
-        notification_manager.play_notification_sound = Mock()
+        gentle, standard = RecordingStub(), RecordingStub()
+        notification_manager.audio_player = {'gentle': gentle, 'standard': standard}
+        notification_manager.settings = notification_manager.replace_settings(audio_enabled=True)
         
-        # Test default gentle sound
+        # Gentle sound by default, escalated sound at level 2
         notification_manager.play_notification_sound(level=1)
-        notification_manager.play_notification_sound.assert_called_with(level=1)
-        
-        # Test escalated sound
+        assert gentle.calls == [('play', (), {})]
         notification_manager.play_notification_sound(level=2)
-        notification_manager.play_notification_sound.assert_called_with(level=2)
+        assert standard.calls == [('play', (), {})]
         
         # Test that sound can be disabled
-        notification_manager.settings.audio_enabled = False
+        notification_manager.settings = notification_manager.replace_settings(audio_enabled=False)
         notification_manager.play_notification_sound(level=1)
-        # Verify it was called
-        assert notification_manager.play_notification_sound.call_count == 3
+        assert len(gentle.calls) == 1
+    
+    @pytest.mark.slow
+    def test_audio_effects_preloaded(self, notification_manager, tmp_path):
+        """Test that sounds are loaded up front and warmed up silently."""
+        pytest.importorskip("PyQt6.QtMultimedia", exc_type=ImportError)
+        sound = tmp_path / "gentle.wav"
+        sound.write_bytes(b"")
+        notification_manager.sound_files = {'gentle': str(sound)}
+        
+        notification_manager.setup_audio()
+        
+        effect = notification_manager.audio_player['gentle']
+        assert effect.source().toLocalFile() == str(sound)
+        assert effect.volume() == 0.0
+        
+        # Normal volume restored once the warm-up is over
+        QTest.qWait(150)
+        assert effect.volume() == 1.0
+    
+    def test_audio_backend_not_imported_without_sound_files(self, notification_manager, tmp_path):
+        """Test that QtMultimedia stays unloaded when there is nothing to play."""
+        notification_manager.sound_files = {'gentle': str(tmp_path / "missing.wav")}
+        
+        # Any import of the backend would fail and leave audio_player as None
+        with patch.dict(sys.modules, {'PyQt6.QtMultimedia': None}):
+            notification_manager.setup_audio()
+        assert notification_manager.audio_player == {}
+    
+    @pytest.mark.slow
+    def test_audio_loaded_only_when_enabled(self, notification_manager, tmp_path):
+        """Test that no sounds are loaded while audio is turned off."""
+        sound = tmp_path / "gentle.wav"
+        sound.write_bytes(b"")
+        notification_manager.sound_files = {'gentle': str(sound)}
+        
+        # Stub the backend so the test doesn't depend on a working audio stack
+        multimedia = MagicMock()
+        with patch.dict(sys.modules, {'PyQt6.QtMultimedia': multimedia}):
+            notification_manager.settings.audio_enabled = False
+            notification_manager.setup_audio()
+            assert notification_manager.audio_player == {}
+            multimedia.QSoundEffect.assert_not_called()
+            
+            notification_manager.update_settings(audio_enabled=True)
+            effect = notification_manager.audio_player['gentle']
+            assert effect is multimedia.QSoundEffect.return_value
+            effect.setSource.assert_called_once()
+            
+            notification_manager.update_settings(audio_enabled=False)
+            assert notification_manager.audio_player == {}
+            effect.deleteLater.assert_called_once()
     
     def test_notification_persistence_after_dismissal(self, notification_manager):
         """Test that notifications gently persist if dismissed."""
-        notification_manager.show_break_suggestion = Mock()
-        notification_manager.on_notification_dismissed = Mock()
-        
-        # Mock reminder timer
-        notification_manager.reminder_timer = Mock()
-        notification_manager.reminder_timer.isActive = Mock(return_value=True)
-        notification_manager.reminder_timer.start = Mock()
+        dismissed = []
+        notification_manager.notification_dismissed.connect(dismissed.append)
+        notification_manager.hyperfocus_mode = False
+        notification_manager.settings.reminder_interval = 300
+        notification_manager.notification_level = 2
         
         # User dismisses notification
-        notification_manager.on_notification_dismissed()
-        notification_manager.reminder_timer.start(300000)  # 5 minute reminder
-        
-        # Should schedule a gentle reminder
-        assert notification_manager.reminder_timer.start.called
-        # Verify reminder timer was properly configured
-        assert notification_manager.reminder_timer.start.called
-        notification_manager.notification_level = 1  # Set to gentle for test
-        assert notification_manager.notification_level == 1
+        with patch('src.ui.notification_manager.monotonic', return_value=1000.0):
+            notification_manager.on_notification_dismissed()
+        
+        # Escalation resets and a gentle reminder follows after the interval
+        assert dismissed == [2]
+        assert notification_manager.notification_level == 0
+        reminder = notification_manager._sched_entries[notification_manager._show_gentle_reminder]
+        assert reminder[0] == 1300.0
     
     def test_break_achievement_tracking(self, notification_manager):
         """Test that taking breaks awards XP for ADHD motivation."""
-        # Mock achievement signal
-        notification_manager.achievement_unlocked = Mock()
-        notification_manager.achievement_unlocked.emit = Mock()
-        notification_manager.on_break_taken = Mock()
-        
-        # Simulate taking breaks
-        notification_manager.on_break_taken(duration=5)
-        notification_manager.on_break_taken.assert_called_with(duration=5)
-        
-        # Track breaks for achievements
-        notification_manager.breaks_taken_today = 3
-        assert notification_manager.breaks_taken_today == 3
+        awarded = []
+        notification_manager.achievement_unlocked.connect(
+            lambda name, xp: awarded.append((name, xp)))
+        
+        # Taking a break starts the default 5 minute timer
+        notification_manager.on_break_taken()
+        assert notification_manager.break_duration == 300
+        assert notification_manager._is_scheduled(notification_manager._break_completed)
+        
+        # Finishing it counts the break and awards 10 XP + 2 per minute
+        notification_manager._break_completed()
+        assert awarded == [("Self-Care Champion", 20)]
+        assert notification_manager.breaks_today == 1
     
     def test_integration_with_session_manager(self, session_manager, notification_manager):
         """Test integration between session manager and notification system."""
-        # Mock the integration
-        notification_manager.show_break_suggestion = Mock()
-        session_manager.break_suggested = Mock()
-        session_manager.check_session_time = Mock()
+        notification_manager.settings = notification_manager.replace_settings(
+            audio_enabled=False, desktop_notifications_enabled=False)
+        session_manager.break_suggested.connect(notification_manager.show_break_suggestion)
         
         # Start session and simulate time passing
         session_manager.start_session()
@@ -163,101 +392,217 @@ class TestBreakNotificationSystem:
         
         # Check session time should trigger break suggestion
         session_manager.check_session_time()
-        session_manager.check_session_time.assert_called_once()
+        session_manager.end_session()
+        
+        assert notification_manager.notification_level == 1
+        assert notification_manager.last_notification_text
     
     def test_hyperfocus_protection_mode(self, notification_manager):
         """Test special handling when user is in deep focus."""
-        # Mock hyperfocus detection
-        notification_manager.detect_hyperfocus_mode = Mock()
-        notification_manager.hyperfocus_mode = True
+        notification_manager.settings.audio_enabled = False
         
-        # Test that hyperfocus mode is detected
-        notification_manager.detect_hyperfocus_mode()
-        notification_manager.detect_hyperfocus_mode.assert_called_once()
+        # No break yet this session, so deep focus is assumed
+        with patch.object(notification_manager, '_show_notification') as mock_show, \
+                patch.object(notification_manager, '_show_tray_message') as mock_tray:
+            notification_manager.show_break_suggestion()
+            
+            assert notification_manager.hyperfocus_mode is True
+            mock_show.assert_not_called()
+            assert mock_tray.call_args.args[0] == "Gentle break reminder"
         
-        # Verify hyperfocus mode is active
-        assert notification_manager.hyperfocus_mode is True
+        # Dismissing doesn't bring the reminder back
+        notification_manager.on_notification_dismissed()
+        assert not notification_manager._is_scheduled(notification_manager._show_gentle_reminder)
     
     def test_medication_timing_awareness(self, notification_manager):
         """Test that notifications can adapt to medication schedules."""
-        # Set medication timing
-        notification_manager.settings.medication_times = ["08:00", "14:00"]
+        notification_manager.settings = notification_manager.replace_settings(
+            medication_reminders=True, medication_times=["08:00", "14:00"])
+        
+        with patch('src.ui.notification_manager.datetime') as mock_datetime:
+            mock_datetime.strptime = datetime.strptime
+            
+            # Near a dose the message carries a reminder
+            mock_datetime.now.return_value = datetime(2024, 1, 1, 8, 30)
+            assert "medication" in notification_manager._create_break_message().lower()
+            
+            # Default message should not mention medication
+            mock_datetime.now.return_value = datetime(2024, 1, 1, 11, 0)
+            assert "medication" not in notification_manager._create_break_message().lower()
+    
+    def test_hyperfocus_follows_last_break(self, notification_manager):
+        """Test hyperfocus is assumed only after a long stretch without breaks."""
+        notification_manager.detect_hyperfocus_mode()
+        assert notification_manager.hyperfocus_mode is True
         
-        # Mock show_break_suggestion
-        notification_manager.show_break_suggestion = Mock()
-        notification_manager.last_notification_text = "Your brain has earned a well-deserved break! 🧠✨"
+        notification_manager.break_duration = 300
+        notification_manager._break_completed()
+        notification_manager.detect_hyperfocus_mode()
+        assert notification_manager.hyperfocus_mode is False
+        assert len(notification_manager.session_breaks) == 1
         
-        # Simulate near medication time
-        notification_manager.is_near_medication_time = Mock(return_value=False)
+        notification_manager._last_break_monotonic -= notification_manager.HYPERFOCUS_THRESHOLD_S + 1
+        notification_manager.detect_hyperfocus_mode()
+        assert notification_manager.hyperfocus_mode is True
+    
+    def test_medication_window_check(self, notification_manager):
+        """Test the 30-minute window around (unsorted) medication times."""
+        notification_manager.settings.medication_reminders = True
+        notification_manager.settings.medication_times = ["14:00", "08:00"]
         
-        # Default message should not mention medication
-        assert "medication" not in notification_manager.last_notification_text.lower()
+        with patch('src.ui.notification_manager.datetime') as mock_datetime:
+            mock_datetime.strptime = datetime.strptime
+            
+            mock_datetime.now.return_value = datetime(2024, 1, 1, 8, 25)
+            assert notification_manager._is_medication_time()
+            
+            mock_datetime.now.return_value = datetime(2024, 1, 1, 11, 0)
+            assert not notification_manager._is_medication_time()
+            
+            mock_datetime.now.return_value = datetime(2024, 1, 1, 13, 30)
+            assert notification_manager._is_medication_time()
+    
+    def test_break_message_reused_for_same_state(self, notification_manager):
+        """Test that identical user state yields the same message object."""
+        notification_manager.settings.medication_reminders = False
+        notification_manager.user_energy_level = 4
+        notification_manager.breaks_today = 2
+        
+        first = notification_manager._create_break_message()
+        assert first is notification_manager._create_break_message()
+        assert "celebrate" in first
+        assert "2 breaks today" in first
     
-    def test_notification_settings_persistence(self, notification_manager):
+    def test_notification_settings_persistence(self):
         """Test that notification preferences are saved and loaded."""
+        store = MemorySettings()
+        manager = NotificationManager(settings_store=store)
+        
         # Change settings
-        notification_manager.settings.audio_enabled = False
-        notification_manager.settings.escalation_enabled = False
-        notification_manager.settings.reminder_interval = 180  # 3 minutes
+        manager.settings.audio_enabled = False
+        manager.settings.escalation_enabled = False
+        manager.settings.reminder_interval = 180  # 3 minutes
         
         # Save settings
-        notification_manager.save_settings()
+        manager.save_settings()
+        assert store['reminder_interval'] == 180
         
         # Create new manager and load settings
-        new_manager = NotificationManager()
+        new_manager = NotificationManager(settings_store=store)
         new_manager.load_settings()
         
         assert new_manager.settings.audio_enabled == False
         assert new_manager.settings.escalation_enabled == False
         assert new_manager.settings.reminder_interval == 180
     
+    def test_replace_settings_leaves_current_settings_alone(self, notification_manager):
+        """Test that replace_settings returns a changed copy."""
+        current = notification_manager.settings
+        changed = notification_manager.replace_settings(audio_enabled=False, reminder_interval=60)
+        
+        assert changed is not current
+        assert (changed.audio_enabled, changed.reminder_interval) == (False, 60)
+        assert (current.audio_enabled, current.reminder_interval) == (True, 120)
+        assert changed.gentle_mode == current.gentle_mode
+        
+        with pytest.raises(TypeError):
+            notification_manager.replace_settings(volume=11)
+    
+    def test_settings_load_restores_types_and_defaults(self, notification_manager):
+        """Test that every settings field loads with its declared type."""
+        stored = {'reminder_interval': 300, 'gentle_mode': False}
+        
+        with patch('src.ui.notification_manager.QSettings') as mock_settings:
+            mock_settings.return_value.value.side_effect = \
+                lambda key, default, type: stored.get(key, default)
+            notification_manager.load_settings()
+            
+        assert notification_manager.settings.reminder_interval == 300
+        assert notification_manager.settings.gentle_mode is False
+        assert notification_manager.settings.medication_times == ["08:00", "14:00"]
+        assert notification_manager.settings.medication_times is not NotificationSettings().medication_times
+        
+        requested = {c.args[0]: c.kwargs['type'] for c in mock_settings.return_value.value.call_args_list}
+        assert requested['medication_times'] is list
+        assert requested['audio_enabled'] is bool
+    
+    @pytest.mark.slow
+    def test_settings_changes_saved_once(self, notification_manager):
+        """Test that a burst of settings edits produces a single write."""
+        with patch('src.ui.notification_manager.QSettings') as mock_settings:
+            notification_manager.update_settings(audio_enabled=False)
+            notification_manager.update_settings(reminder_interval=180)
+            notification_manager.update_settings(gentle_mode=False)
+            mock_settings.assert_not_called()
+            
+            QTest.qWait(notification_manager.SETTINGS_SAVE_DELAY_MS + 100)
+            
+            mock_settings.assert_called_once()
+            stored = mock_settings.return_value
+            stored.setValue.assert_any_call("reminder_interval", 180)
+            stored.sync.assert_called_once()
+            
+        assert notification_manager.settings.audio_enabled is False
+        
+        with pytest.raises(AttributeError):
+            notification_manager.update_settings(volume=11)
+    
+    def test_pending_settings_saved_on_quit(self, qapp):
+        """Test that a debounced settings save still happens at shutdown."""
+        store = MemorySettings()
+        manager = NotificationManager(settings_store=store)
+        manager.update_settings(reminder_interval=180)
+        assert 'reminder_interval' not in store
+        
+        qapp.aboutToQuit.emit()
+        assert store['reminder_interval'] == 180
+        assert not manager._is_scheduled(manager._flush_settings)
+        
+        # Nothing pending: quitting doesn't write again
+        store.clear()
+        qapp.aboutToQuit.emit()
+        assert store == {}
+    
+    def test_break_consistency_from_intervals(self, notification_manager):
+        """Test consistency and session length computed from break times."""
+        notification_manager.session_breaks = [0.0, 1500.0, 3000.0, 4500.0]
+        assert notification_manager._calculate_break_consistency() == 1.0
+        assert notification_manager._calculate_average_session_length() == 25
+        
+        notification_manager.session_breaks = [0.0, 600.0, 3000.0]
+        assert notification_manager._calculate_break_consistency() == pytest.approx(1 - 900 / 1500)
+    
     def test_break_session_statistics(self, notification_manager):
         """Test tracking of break-taking patterns for insights."""
-        # Mock break tracking
-        notification_manager.on_break_taken = Mock()
-        notification_manager.breaks_taken_today = 0
-        
-        # User takes several breaks
-        for i in range(3):
-            notification_manager.on_break_taken()
-            notification_manager.breaks_taken_today += 1
-        
-        # Mock statistics
-        notification_manager.get_break_statistics = Mock(return_value={
-            'breaks_today': notification_manager.breaks_taken_today,
-            'break_consistency': 0.8,
-            'average_session_length': 25
-        })
+        # User takes several evenly spaced breaks
+        notification_manager.breaks_today = 3
+        notification_manager.session_breaks = [0.0, 1500.0, 3000.0, 4500.0]
         
         stats = notification_manager.get_break_statistics()
         
         assert stats['breaks_today'] == 3
-        assert stats['break_consistency'] >= 0  # Should calculate consistency score
-        assert 'average_session_length' in stats
+        assert stats['total_session_breaks'] == 4
+        assert stats['break_consistency'] == 1.0
+        assert stats['average_session_length'] == 25
         
-        # Mock insights
-        notification_manager.get_adhd_insights = Mock(return_value=['Take regular breaks'])
         insights = notification_manager.get_adhd_insights()
-        assert isinstance(insights, list)
-        assert len(insights) > 0
+        assert len(insights) == 2
+        assert "Excellent break rhythm" in insights[0]
     
-    def test_cross_platform_notification_compatibility(self, notification_manager):
+    @pytest.mark.parametrize(("sys_name", "expected"), [
+        ("Windows", "windows"),
+        ("Linux", "linux"),
+        ("Darwin", "macos"),
+        ("FreeBSD", "generic"),
+    ])
+    def test_cross_platform_notification_compatibility(self, sys_name, expected):
         """Test that notifications work across different platforms."""
-        with patch('platform.system') as mock_platform:
-            # Test Windows
-            mock_platform.return_value = 'Windows'
-            notification_manager.setup_platform_notifications()
-            assert notification_manager.platform_handler == 'windows'
-            
-            # Test Linux
-            mock_platform.return_value = 'Linux'
-            notification_manager.setup_platform_notifications()
-            assert notification_manager.platform_handler == 'linux'
-            
-            # Test macOS
-            mock_platform.return_value = 'Darwin'
-            notification_manager.setup_platform_notifications()
-            assert notification_manager.platform_handler == 'macos'
+        assert _PLATFORM_HANDLERS.get(sys_name, 'generic') == expected
+    
+    def test_platform_handler_resolved_for_running_system(self, notification_manager):
+        """Test that the handler is resolved once at import for this platform."""
+        assert notification_manager.platform_handler == \
+            _PLATFORM_HANDLERS.get(platform.system(), 'generic')
     
     def test_notification_during_panic_mode(self, notification_manager):
         """Test that break notifications respect panic mode state."""
@@ -266,11 +611,24 @@ class TestBreakNotificationSystem:
         notification_manager.show_break_suggestion()
         
         # Should not show break notifications during panic mode
-        notification_manager.desktop_notifications.show_gentle.assert_not_called()
+        assert not notification_manager.desktop_notifications.calls
+        notification_manager.tray_icon.showMessage.assert_not_called()
         
         # Should queue notification for after panic mode
         assert len(notification_manager.queued_notifications) == 1
     
+    def test_repeated_suggestions_during_panic_collapse(self, notification_manager):
+        """Test that a long panic mode replays each queued kind only once."""
+        notification_manager.set_panic_mode(True)
+        for _ in range(5):
+            notification_manager.show_break_suggestion()
+        assert list(notification_manager.queued_notifications) == ['break_suggestion']
+        
+        with patch.object(notification_manager, 'show_break_suggestion') as mock_show:
+            notification_manager.set_panic_mode(False)
+            mock_show.assert_called_once()
+        assert not notification_manager.queued_notifications
+    
     def test_energy_level_adaptive_notifications(self, notification_manager):
         """Test notifications adapt to user's self-reported energy level."""
         # Low energy - more encouragement
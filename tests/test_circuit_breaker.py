@@ -1,11 +1,13 @@
 """Test circuit breaker pattern for Claude API resilience."""
+import itertools
 import pytest
 import time
 from unittest.mock import Mock, patch, MagicMock
-from datetime import datetime, timedelta
 import subprocess
 
-from src.analysis.claude_analyzer import ClaudeAnalyzer, CircuitBreakerError, CircuitState
+from src.analysis.claude_analyzer import (
+    ClaudeAnalyzer, CircuitBreakerError, CircuitState, AnalysisError
+)
 
 
 class TestCircuitBreakerPattern:
@@ -36,6 +38,12 @@ class TestCircuitBreakerPattern:
             "adhd_tips": ["Tip 1"]
         }'''
     
+    @pytest.fixture(autouse=True)
+    def no_retry_sleep(self):
+        """Skip the real retry backoff sleeps."""
+        with patch('time.sleep'):
+            yield
+    
     @pytest.fixture
     def analyzer(self):
         """Create Claude analyzer with circuit breaker."""
@@ -62,15 +70,12 @@ class TestCircuitBreakerPattern:
             
             # Multiple successful calls
             for _ in range(5):
-                try:
-                    result = analyzer.analyze_problems("test content")
-                    # Circuit should work in closed state
-                except CircuitBreakerError:
-                    # Circuit might open if there are failures
-                    pass
+                analyzer.analyze_problems("test content")
                 
             # Check circuit state
-            assert analyzer.circuit_state in [CircuitState.CLOSED, CircuitState.OPEN]
+            assert analyzer.circuit_state == CircuitState.CLOSED
+            # Repeats were served from the cache
+            assert mock_claude.call_count == 1
     
     def test_circuit_opens_after_failure_threshold(self, analyzer):
         """Test circuit opens after reaching failure threshold."""
@@ -96,7 +101,7 @@ class TestCircuitBreakerPattern:
         # Force circuit to open state
         analyzer.circuit_state = CircuitState.OPEN
         analyzer.failure_count = analyzer.failure_threshold
-        analyzer.last_failure_time = datetime.now()
+        analyzer.last_failure_time = time.monotonic()
         
         # Attempt to make call
         with pytest.raises(CircuitBreakerError) as exc_info:
@@ -109,7 +114,7 @@ class TestCircuitBreakerPattern:
         # Force circuit to open state in the past
         analyzer.circuit_state = CircuitState.OPEN
         analyzer.failure_count = analyzer.failure_threshold
-        analyzer.last_failure_time = datetime.now() - timedelta(seconds=analyzer.recovery_timeout + 1)
+        analyzer.last_failure_time = time.monotonic() - (analyzer.recovery_timeout + 1)
         
         with patch.object(analyzer, '_run_claude_cli') as mock_claude:
             # Return valid JSON response
@@ -128,12 +133,14 @@ class TestCircuitBreakerPattern:
         analyzer.half_open_calls = 0
         analyzer.cache_enabled = False  # Disable cache to ensure all calls go through
         
-        with patch.object(analyzer, '_run_claude_cli') as mock_claude:
+        with patch.object(analyzer, '_run_claude_cli') as mock_claude, \
+                patch('random.random', return_value=0.0):  # Admit every call
             # Return valid JSON in expected format
             mock_claude.return_value = self.valid_claude_response
             
-            # Make successful calls up to half-open limit
-            for i in range(analyzer.half_open_max_calls):
+            # Make successful calls through the recovery ramp
+            for i in range(analyzer.recovery_ramp_calls):
+                assert analyzer.circuit_state == CircuitState.HALF_OPEN
                 result = analyzer.analyze_problems("test content")
                 assert result is not None
                 
@@ -142,6 +149,28 @@ class TestCircuitBreakerPattern:
             assert analyzer.failure_count == 0
             assert analyzer.half_open_calls == 0
     
+    def test_half_open_admits_growing_share_after_probes(self, analyzer):
+        """Test that past the probes, half-open calls are let through gradually."""
+        analyzer.circuit_state = CircuitState.HALF_OPEN
+        analyzer.cache_enabled = False
+        
+        with patch.object(analyzer, '_run_claude_cli') as mock_claude:
+            mock_claude.return_value = self.valid_claude_response
+            
+            # Probes always go through
+            for _ in range(analyzer.half_open_max_calls):
+                analyzer.analyze_problems("test content")
+            assert mock_claude.call_count == analyzer.half_open_max_calls
+            assert analyzer._recovery_fraction == pytest.approx(
+                analyzer.half_open_max_calls / analyzer.recovery_ramp_calls)
+            
+            # A call drawn above the admitted share is turned away
+            with patch('random.random', return_value=0.99):
+                with pytest.raises(CircuitBreakerError):
+                    analyzer.analyze_problems("test content")
+            assert mock_claude.call_count == analyzer.half_open_max_calls
+            assert analyzer.circuit_state == CircuitState.HALF_OPEN
+    
     def test_half_open_returns_to_open_on_failure(self, analyzer):
         """Test half-open circuit returns to open on failure."""
         # Set circuit to half-open
@@ -162,25 +191,122 @@ class TestCircuitBreakerPattern:
             assert analyzer.failure_count >= 1
             assert analyzer.last_failure_time is not None
     
+    def test_concurrent_failures_open_circuit_once(self, analyzer):
+        """Test that racing failures produce a single open transition."""
+        import threading
+        
+        threads = [threading.Thread(target=analyzer._record_failure) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+            
+        assert analyzer.circuit_state == CircuitState.OPEN
+        assert analyzer.failure_count == 20
+        assert analyzer.circuit_opened_count == 1
+    
+    def test_bulkhead_turns_away_excess_calls(self, analyzer):
+        """Test that calls beyond the concurrency cap fail fast without tripping."""
+        while analyzer._claude_semaphore.acquire(blocking=False):
+            pass
+        
+        with patch.object(analyzer, '_run_claude_cli') as mock_claude:
+            with pytest.raises(CircuitBreakerError) as exc_info:
+                analyzer.analyze_problems("test content")
+            
+            mock_claude.assert_not_called()
+        assert "busy" in str(exc_info.value).lower()
+        assert analyzer.failure_count == 0
+        assert analyzer.circuit_state == CircuitState.CLOSED
+    
+    def test_bulkhead_slot_released_during_backoff(self, analyzer):
+        """Test that a retrying call doesn't hold its slot while sleeping."""
+        free_slots = []
+        total_slots = analyzer._claude_semaphore._value
+        
+        def record_free_slots(seconds):
+            free_slots.append(analyzer._claude_semaphore._value)
+        
+        with patch('time.sleep', side_effect=record_free_slots):
+            with patch.object(analyzer, '_run_claude_cli',
+                              side_effect=[Exception("flaky"), self.valid_claude_response]):
+                analyzer.analyze_problems("test content")
+        
+        assert free_slots == [total_slots]
+        assert analyzer._claude_semaphore._value == total_slots
+    
+    def test_concurrent_identical_requests_share_one_call(self, analyzer):
+        """Test that duplicate in-flight analyses spawn the CLI only once."""
+        import threading
+        
+        analyzer.cache_enabled = False  # Only in-flight sharing can help
+        in_cli = threading.Event()
+        release = threading.Event()
+        
+        def slow_claude(prompt, timeout):
+            in_cli.set()
+            release.wait(5)
+            return self.valid_claude_response
+        
+        results = []
+        run = lambda: results.append(analyzer.analyze_problems("test content"))
+        with patch.object(analyzer, '_run_claude_cli', side_effect=slow_claude) as mock_claude:
+            first = threading.Thread(target=run)
+            first.start()
+            assert in_cli.wait(5)
+            
+            # Let the duplicate go only once it is waiting on the first call
+            (future,) = analyzer._inflight.values()
+            waiting = threading.Event()
+            original_result = future.result
+            future.result = lambda: (waiting.set(), original_result())[1]
+            second = threading.Thread(target=run)
+            second.start()
+            assert waiting.wait(5)
+            
+            release.set()
+            first.join(5)
+            second.join(5)
+            
+            mock_claude.assert_called_once()
+        assert len(results) == 2 and results[0] == results[1]
+        assert analyzer._inflight == {}
+    
     def test_exponential_backoff_timing(self, analyzer):
         """Test exponential backoff increases recovery timeout."""
         initial_timeout = analyzer.recovery_timeout
         
-        # Test that recovery timeout is properly initialized
-        assert analyzer.recovery_timeout > 0
-        # Note: _calculate_backoff_timeout is not implemented in the analyzer
-        # This test validates basic recovery timeout functionality
+        # Jitter never lets a later trip wait less than an earlier one
+        assert analyzer._compute_backoff(3) > analyzer._compute_backoff(1)
+        assert initial_timeout / 2 <= analyzer._compute_backoff(1) <= initial_timeout * 1.5
+        assert analyzer._compute_backoff(50) <= analyzer.max_recovery_timeout
+        
+        # Repeated half-open failures keep growing the timeout...
+        analyzer.circuit_state = CircuitState.HALF_OPEN
+        analyzer._record_failure()
+        analyzer.circuit_state = CircuitState.HALF_OPEN
+        analyzer._record_failure()
+        assert analyzer._trip_count == 2
+        assert analyzer.recovery_timeout >= initial_timeout
+        
+        # ...and closing the circuit starts over
+        analyzer.circuit_state = CircuitState.HALF_OPEN
+        for _ in range(analyzer.recovery_ramp_calls):
+            analyzer._record_success()
+        assert analyzer._trip_count == 0
+        assert analyzer.recovery_timeout == initial_timeout
     
     def test_circuit_breaker_metrics_tracking(self, analyzer):
         """Test that circuit breaker tracks metrics for monitoring."""
+        analyzer.cache_enabled = False
+        analyzer.max_retries = 1  # One CLI call per analysis
+        
         with patch.object(analyzer, '_run_claude_cli') as mock_claude:
-            # Simulate mixed success/failure pattern
-            mock_claude.side_effect = [
-                '{"steps": [{"description": "Step 1", "hints": []}], "difficulty_rating": 3}',  # success
-                subprocess.CalledProcessError(1, 'claude'),     # failure
-                '{"steps": [{"description": "Step 1", "hints": []}], "difficulty_rating": 3}',  # success
-                subprocess.CalledProcessError(1, 'claude'),     # failure
-            ]
+            # Simulate alternating success/failure pattern
+            mock_claude.side_effect = itertools.cycle([
+                self.valid_claude_response,                  # success
+                subprocess.CalledProcessError(1, 'claude'),  # failure
+            ])
             
             success_count = 0
             failure_count = 0
@@ -189,11 +315,18 @@ class TestCircuitBreakerPattern:
                 try:
                     analyzer.analyze_problems("test")
                     success_count += 1
-                except (CircuitBreakerError, Exception):
+                except AnalysisError:
                     failure_count += 1
-                    
-            # Basic metric tracking validation
-            assert success_count > 0 or failure_count > 0
+            
+            assert mock_claude.call_count == 4
+        
+        assert (success_count, failure_count) == (2, 2)
+        metrics = analyzer.get_circuit_metrics()
+        assert metrics['total_calls'] == 4
+        assert metrics['failed_calls'] == 2
+        assert metrics['success_rate'] == 0.5
+        # Each success resets the run, so the circuit never trips
+        assert metrics['current_state'] == 'closed'
     
     def test_cached_responses_during_outage(self, analyzer):
         """Test that cached responses are used when circuit is open."""
@@ -208,17 +341,34 @@ class TestCircuitBreakerPattern:
             
         # Force circuit to open
         analyzer.circuit_state = CircuitState.OPEN
-        analyzer.last_failure_time = datetime.now()
+        analyzer.last_failure_time = time.monotonic()
         
         # Attempt same call - should return cached response
         result2 = analyzer.analyze_problems("test content")
         assert result2 is not None
         assert result2 == result1  # Should be identical cached response
     
+    def test_similar_cached_problem_served_during_outage(self, analyzer):
+        """Test that a near-identical problem reuses a cached analysis when open."""
+        with patch.object(analyzer, '_run_claude_cli') as mock_claude:
+            mock_claude.return_value = self.valid_claude_response
+            result1 = analyzer.analyze_problems("Find the derivative of f(x) = sin(x)cos(x)")
+            
+        analyzer.circuit_state = CircuitState.OPEN
+        analyzer.last_failure_time = time.monotonic()
+        
+        # Trailing punctuation and spacing differ - still the same problem
+        result2 = analyzer.analyze_problems("Find the derivative of f(x) = sin(x) cos(x).")
+        assert result2['problems'][0]['steps'] == result1['problems'][0]['steps']
+        
+        # An unrelated problem is still blocked
+        with pytest.raises(CircuitBreakerError):
+            analyzer.analyze_problems("Integrate g(t) = e^t from 0 to 1")
+    
     def test_graceful_degradation_messaging(self, analyzer):
         """Test ADHD-friendly error messages during outages."""
         analyzer.circuit_state = CircuitState.OPEN
-        analyzer.last_failure_time = datetime.now()
+        analyzer.last_failure_time = time.monotonic()
         
         try:
             analyzer.analyze_problems("test content")
@@ -234,7 +384,7 @@ class TestCircuitBreakerPattern:
     def test_circuit_state_recovery_time_estimation(self, analyzer):
         """Test estimation of recovery time for user feedback."""
         analyzer.circuit_state = CircuitState.OPEN
-        analyzer.last_failure_time = datetime.now()
+        analyzer.last_failure_time = time.monotonic()
         
         with pytest.raises(CircuitBreakerError) as exc_info:
             analyzer.analyze_problems("test content")
@@ -242,20 +392,23 @@ class TestCircuitBreakerPattern:
         error_message = str(exc_info.value)
         # Should provide helpful guidance
         assert any(word in error_message.lower() for word in ['try', 'continue', 'manual', 'break'])
+        # Wait is rounded up to a 10-second bucket
+        assert "try again in 60 seconds" in error_message
     
     def test_circuit_recovery_notification(self, analyzer):
         """Test notification when circuit breaker recovers."""
         # Simulate circuit opening and then recovering
         analyzer.circuit_state = CircuitState.OPEN
-        analyzer.last_failure_time = datetime.now() - timedelta(seconds=analyzer.recovery_timeout + 1)
+        analyzer.last_failure_time = time.monotonic() - (analyzer.recovery_timeout + 1)
         analyzer.cache_enabled = False  # Disable cache for this test
         
-        with patch.object(analyzer, '_run_claude_cli') as mock_claude:
+        with patch.object(analyzer, '_run_claude_cli') as mock_claude, \
+                patch('random.random', return_value=0.0):  # Admit every call
             # Return valid JSON response
             mock_claude.return_value = self.valid_claude_response
             
             # Make successful calls after recovery
-            for _ in range(analyzer.half_open_max_calls):
+            for _ in range(analyzer.recovery_ramp_calls):
                 analyzer.analyze_problems("test content")
                 
             # Circuit should be closed after successful half-open calls
@@ -274,19 +427,76 @@ class TestCircuitBreakerPattern:
                 
             # Timeout should not immediately open circuit
             # (or count differently than API errors)
-            assert analyzer.failure_count <= 1  # Timeout might count as 1, not same as API error
+            assert analyzer.failure_count == 0
+            assert analyzer.timeout_count == 1
+            assert analyzer.circuit_state == CircuitState.CLOSED
+            # Timeouts fail fast instead of being retried
+            mock_claude.assert_called_once()
+            
+            # Only a run of timeouts trips the circuit
+            for _ in range(analyzer.timeout_threshold - 1):
+                try:
+                    analyzer.analyze_problems("test content")
+                except (CircuitBreakerError, AnalysisError):
+                    pass
+            assert analyzer.circuit_state == CircuitState.OPEN
+    
+    def test_success_resets_timeout_run(self, analyzer):
+        """Test that only consecutive timeouts count toward tripping."""
+        analyzer.timeout_count = analyzer.timeout_threshold - 1
+        analyzer._record_success()
+        
+        analyzer._record_timeout()
+        assert analyzer.timeout_count == 1
+        assert analyzer.circuit_state == CircuitState.CLOSED
     
     def test_circuit_state_persistence(self, analyzer):
         """Test that circuit state can be persisted across restarts."""
         # Set circuit to open state
         analyzer.circuit_state = CircuitState.OPEN
         analyzer.failure_count = 5
-        analyzer.last_failure_time = datetime.now()
+        analyzer.last_failure_time = time.monotonic()
         
         # Test basic state attributes
         assert analyzer.circuit_state == CircuitState.OPEN
         assert analyzer.failure_count == 5
         assert analyzer.last_failure_time is not None
+        
+        # Round-trip through a fresh analyzer keeps the recovery countdown
+        saved = analyzer.save_circuit_state()
+        restored = ClaudeAnalyzer(recovery_timeout=60)
+        restored.restore_circuit_state(saved)
+        
+        assert restored.circuit_state == CircuitState.OPEN
+        assert restored.failure_count == 5
+        assert 0 < restored._get_recovery_time_remaining() <= analyzer.recovery_timeout
+    
+    def test_circuit_state_survives_restart(self, tmp_path):
+        """Test that an open circuit is still open after a restart."""
+        state_path = tmp_path / "circuit_state.bin"
+        first = ClaudeAnalyzer(failure_threshold=2, recovery_timeout=60,
+                               state_path=str(state_path))
+        first._record_failure()
+        first._record_failure()
+        assert first.circuit_state == CircuitState.OPEN
+        
+        restarted = ClaudeAnalyzer(failure_threshold=2, recovery_timeout=60,
+                                   state_path=str(state_path))
+        assert restarted.circuit_state == CircuitState.OPEN
+        assert restarted.failure_count == 2
+        assert restarted._trip_count == 1
+        assert restarted.recovery_timeout == first.recovery_timeout
+        with pytest.raises(CircuitBreakerError):
+            restarted.analyze_problems("test content")
+    
+    def test_unrecognised_state_file_is_ignored(self, tmp_path):
+        """Test that a state file from elsewhere leaves the circuit closed."""
+        state_path = tmp_path / "circuit_state.bin"
+        state_path.write_bytes(b"not a circuit state" * 4)
+        
+        analyzer = ClaudeAnalyzer(state_path=str(state_path))
+        assert analyzer.circuit_state == CircuitState.CLOSED
+        assert analyzer.last_failure_time is None
     
     def test_health_check_functionality(self, analyzer):
         """Test periodic health checks to verify Claude availability."""
@@ -332,6 +542,7 @@ class TestCircuitBreakerPattern:
                 
         # Circuit breaker should not be engaged
         assert analyzer_disabled.circuit_state == CircuitState.CLOSED
+        assert analyzer_disabled.failure_count == 0
     
     def test_integration_with_existing_cache(self, analyzer):
         """Test circuit breaker works with existing LRU cache."""
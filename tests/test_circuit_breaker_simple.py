@@ -10,6 +10,12 @@ from src.analysis.claude_analyzer import ClaudeAnalyzer, CircuitBreakerError, Ci
 class TestCircuitBreakerSimple:
     """Basic circuit breaker pattern tests."""
     
+    @pytest.fixture(autouse=True)
+    def no_retry_sleep(self):
+        """Skip the real retry backoff sleeps."""
+        with patch('time.sleep'):
+            yield
+    
     @pytest.fixture
     def analyzer(self):
         """Create analyzer with circuit breaker enabled."""
@@ -3,7 +3,8 @@ import pytest
 import sys
 from unittest.mock import Mock, patch, MagicMock
 from PyQt6.QtWidgets import QApplication, QMessageBox
-from PyQt6.QtCore import QTimer
+from PyQt6.QtCore import QTimer, QSettings
+from PyQt6.QtTest import QTest
 
 # Ensure QApplication exists
 if not QApplication.instance():
@@ -17,9 +18,14 @@ class TestDatabaseUISync:
     """Test full database-UI synchronization."""
     
     @pytest.fixture
-    def sync_window(self, qtbot):
+    def sync_window(self, qtbot, tmp_path):
         """Create synchronized window for testing."""
-        with patch('src.ui.main_window_integrated.DatabaseManager'):
+        # Keep the first-run flag out of the real user config, and keep the
+        # deferred inbox hint and the resume prompt from opening modal dialogs
+        QSettings.setPath(QSettings.Format.NativeFormat, QSettings.Scope.UserScope, str(tmp_path))
+        with patch('src.core.state_synchronizer.StateSynchronizer.load_last_state', return_value=None), \
+                patch.object(FocusQuestSyncWindow, '_show_initial_hint'), \
+                patch('src.ui.main_window_integrated.DatabaseManager'):
             with patch('src.ui.file_watcher_integration.EnhancedFileWatcher'):
                 with patch('src.ui.file_watcher_integration.QueueProcessor'):
                     with patch('src.core.state_synchronizer.DatabaseManager'):
@@ -50,7 +56,7 @@ class TestDatabaseUISync:
                                     # Clear any pending timers
                                     QTimer.singleShot(0, lambda: None)  # Process events
                                     
-                                return window
+                                yield window
     
     def test_window_initializes_user_session(self, sync_window):
         """Test that window initializes user and session on startup."""
@@ -126,7 +132,44 @@ class TestDatabaseUISync:
             
         # Should save skip
         sync_window.state_sync.skip_problem.assert_called_once()
-        
+
+    def test_cancelled_skip_is_not_saved(self, sync_window):
+        """Test that backing out of the skip dialog records nothing."""
+        sync_window.state_sync.skip_problem = Mock()
+        sync_window.current_problem = {'id': 123}
+
+        with patch.object(sync_window, 'show_skip_confirmation', return_value=False):
+            sync_window.skip_problem()
+
+        sync_window.state_sync.skip_problem.assert_not_called()
+
+    def test_completion_saved_before_next_problem_loads(self, sync_window):
+        """Test that advancing records the completion, then loads once."""
+        calls = []
+        sync_window.current_problem = {'id': 123, 'difficulty': 3}
+        sync_window.problem_queue.append({'id': 124, 'source': 'database'})
+        sync_window.state_sync.complete_problem = Mock(
+            side_effect=lambda xp: calls.append('complete'))
+        sync_window.state_sync.get_user_stats = Mock(return_value={})
+        sync_window.load_problem = Mock(side_effect=lambda p: calls.append(p['id']))
+
+        sync_window.problem_completed.emit(123)
+
+        assert calls == ['complete', 124]
+
+    def test_hint_count_resets_for_next_problem(self, sync_window):
+        """Test that hints used are counted per problem."""
+        sync_window.state_sync.skip_problem = Mock()
+        sync_window.state_sync.update_problem_progress = Mock()
+        sync_window.problem_widget = Mock(current_step_index=0)
+
+        sync_window._on_hint_used(1)
+        sync_window._on_hint_used(2)
+        assert sync_window._hints_used == 2
+
+        sync_window.problem_skipped.emit(123)
+        assert sync_window._hints_used == 0
+
     def test_step_progress_updates_db(self, sync_window):
         """Test that step completion updates database."""
         # Mock state sync
@@ -135,6 +178,10 @@ class TestDatabaseUISync:
         # Complete step
         sync_window._on_step_completed(3)
         
+        # Write is debounced
+        sync_window.state_sync.update_problem_progress.assert_not_called()
+        sync_window._flush_progress()
+        
         # Should update progress
         sync_window.state_sync.update_problem_progress.assert_called_with(step=3)
         
@@ -146,6 +193,7 @@ class TestDatabaseUISync:
         
         # Use hint
         sync_window._on_hint_used(1)
+        sync_window._flush_progress()
         
         # Should update with hint count
         sync_window.state_sync.update_problem_progress.assert_called_with(
@@ -153,6 +201,23 @@ class TestDatabaseUISync:
             hints_used=1
         )
         
+    def test_progress_updates_are_coalesced(self, sync_window):
+        """Test that a burst of step/hint events produces one DB write."""
+        sync_window.state_sync.update_problem_progress = Mock()
+        sync_window.problem_widget = Mock(current_step_index=1)
+        
+        sync_window._on_step_completed(0)
+        sync_window._on_hint_used(1)
+        sync_window._on_step_completed(1)
+        
+        # Flushed by the debounce timer
+        QTest.qWait(sync_window.PROGRESS_FLUSH_DELAY_MS + 100)
+        
+        sync_window.state_sync.update_problem_progress.assert_called_once_with(
+            step=1,
+            hints_used=1
+        )
+        
     def test_break_pauses_processing_and_saves(self, sync_window):
         """Test that taking break pauses and saves state."""
         # Mock methods
@@ -168,6 +233,19 @@ class TestDatabaseUISync:
         # Should save state
         sync_window.state_sync.save_current_state.assert_called_once()
         
+    def test_break_flushes_progress_before_saving(self, sync_window):
+        """Test that debounced progress is written before the break snapshot."""
+        calls = []
+        sync_window.state_sync.update_problem_progress = Mock(
+            side_effect=lambda **kwargs: calls.append('progress'))
+        sync_window.state_sync.save_current_state = Mock(
+            side_effect=lambda: calls.append('save'))
+        
+        sync_window._on_step_completed(2)
+        sync_window._on_break_started()
+        
+        assert calls == ['progress', 'save']
+        
     def test_xp_calculation_with_bonuses(self, sync_window):
         """Test XP calculation includes appropriate bonuses."""
         # Test base case
@@ -214,6 +292,33 @@ class TestDatabaseUISync:
             # Should load the problem
             sync_window._load_problem_by_id.assert_called_with(123)
             
+    def test_load_problem_by_id_reads_columns(self, sync_window, tmp_path):
+        """Test that recovery loads a problem's columns by id."""
+        from src.database.db_manager import DatabaseManager
+        
+        db_manager = DatabaseManager(str(tmp_path / "test.db"))
+        with db_manager.session_scope() as session:
+            session.add(Problem(
+                original_text="מצא את הנגזרת",
+                translated_text="Find the derivative",
+                difficulty=4,
+                category="calculus"
+            ))
+        sync_window.db_manager = db_manager
+        sync_window.load_problem = Mock()
+        
+        sync_window._load_problem_by_id(1)
+        
+        sync_window.load_problem.assert_called_once_with({
+            'id': 1,
+            'original_text': "מצא את הנגזרת",
+            'translated_text': "Find the derivative",
+            'difficulty': 4,
+            'steps': [],
+            'hints': [],
+            'source': 'database'
+        })
+        
     def test_clean_shutdown_saves_state(self, sync_window):
         """Test that closing window properly saves state."""
         # Mock methods
@@ -230,6 +335,9 @@ class TestDatabaseUISync:
         # Should save state
         sync_window.state_sync.save_current_state.assert_called_once()
         
+        # Should release database connections
+        sync_window.db_manager.dispose.assert_called_once()
+        
     def test_sync_error_shows_notification(self, sync_window):
         """Test that sync errors show user-friendly notification."""
         # Mock notification
@@ -39,6 +39,19 @@ class TestFocusQuestWindow:
         bg_color = palette.color(palette.ColorRole.Window)
         assert bg_color.lightness() < 100  # Dark background
         
+    def test_theme_stylesheet_set_once_on_app(self, window):
+        """Test the theme stylesheet lives on the app, not on each window"""
+        from src.ui.main_window import FocusQuestWindow
+        from src.ui.styles import DARK_THEME_STYLE
+        
+        assert QApplication.instance().styleSheet() == DARK_THEME_STYLE
+        assert window.styleSheet() == ""
+        
+        with patch.object(QApplication.instance(), 'setStyleSheet') as mock_set:
+            second = FocusQuestWindow()
+            second.close()
+            mock_set.assert_not_called()
+        
     def test_single_focus_layout(self, window):
         """Test only one problem shown at a time"""
         assert hasattr(window, 'problem_widget')
@@ -142,12 +155,89 @@ class TestProblemWidget:
         widget.show_hint()
         assert widget.current_hint_level == 3
         
+    def test_hint_area_built_on_first_hint(self, widget):
+        """Test the hint area is only created once a hint is requested"""
+        assert widget.hint_frame is None
+        widget.next_step()  # Nothing to hide yet
+        
+        widget.show_hint()
+        hint_frame = widget.hint_frame
+        assert widget.layout().indexOf(hint_frame) == 1
+        assert widget.hint_label.text() == "Hint 1: Hint 1"
+        
+        widget.show_hint()
+        assert widget.hint_frame is hint_frame
+        
     def test_timer_display(self, widget):
         """Test step timer exists"""
         assert hasattr(widget, 'timer_label')
         # Timer is part of widget layout
         assert widget.timer_label is not None
         
+    def test_timer_counts_from_clock_and_warns_once(self, widget):
+        """Test the timer label follows elapsed time and styles once"""
+        widget.elapsed_time = 300  # Step 1 expects 3 min
+        widget.update_timer()
+        assert widget.timer_label.text() == "Time: 5:00"
+        assert widget.timer_label.property("overtime") is True
+        
+        with patch.object(widget.timer_label, 'setProperty') as mock_style, \
+                patch.object(widget.timer_label, 'update') as mock_repaint:
+            widget.update_timer()
+            mock_style.assert_not_called()
+            mock_repaint.assert_not_called()
+            
+    def test_paused_time_not_counted(self, widget):
+        """Test time in panic mode doesn't count toward the step"""
+        widget.elapsed_time = 60
+        widget.pause_timer()
+        QTest.qWait(1100)
+        assert widget.elapsed_time == 60
+        
+        widget.resume_timer()
+        assert widget.elapsed_time == 60
+        
+    def test_timer_ticks_reuse_prepared_text(self, widget):
+        """Test timer ticks repaint from prepared text without relayout"""
+        from src.ui.styles import get_font
+        label = widget.timer_label
+        label.resize(200, 40)
+        size_hint = label.sizeHint()
+        seconds_texts = list(label._second_texts)
+        assert len(seconds_texts) == 60
+        
+        with patch.object(label, 'setText') as mock_text:
+            for minutes, seconds in ((0, 1), (0, 2), (1, 59), (0, 1)):
+                label.set_time(minutes, seconds)
+                assert not label.grab().isNull()
+            mock_text.assert_not_called()
+            
+        assert label.text() == "Time: 0:01"
+        assert label.sizeHint() == size_hint
+        assert label._second_texts == seconds_texts
+        assert set(label._minute_texts) == {0, 1}
+        
+        # Layouts are rebuilt for a new font
+        label.setFont(get_font(20))
+        assert not label._minute_texts
+        assert label._second_texts[0] is not seconds_texts[0]
+        
+    def test_fonts_shared_between_widgets(self, widget):
+        """Test step fonts come from one shared instance per size"""
+        from src.ui.styles import get_font
+        
+        assert get_font(14) is get_font(14)
+        assert widget.step_widgets[0].content_label.font().pointSize() == 14
+        assert widget.problem_label.font().bold()
+
+    def test_duration_labels(self, widget):
+        """Test step durations are shown as rounded minute captions"""
+        from src.ui.problem_widget import StepWidget
+
+        assert widget.step_widgets[0].duration_label.text() == "~3 min"
+        long_step = StepWidget({'content': 'Long step', 'duration': 90}, 0)
+        assert long_step.duration_label.text() == "~90 min"
+
     def test_checkbox_completion(self, widget):
         """Test step completion checkbox"""
         step_widget = widget.step_widgets[0]
@@ -158,6 +248,20 @@ class TestProblemWidget:
         step_widget.checkbox.setChecked(True)
         assert step_widget.checkbox.isChecked()
 
+    def test_step_completion_is_queued(self, widget):
+        """Test the checkbox click returns before completion is handled"""
+        from PyQt6.QtWidgets import QApplication
+        
+        completed = []
+        widget.step_completed.connect(completed.append)
+        
+        widget.step_widgets[0].checkbox.setChecked(True)
+        assert completed == []
+        
+        QApplication.processEvents()
+        assert completed == [0]
+        widget.step_timer.stop()
+
 
 class TestXPSystem:
     """Test XP and leveling UI"""
@@ -180,6 +284,24 @@ class TestXPSystem:
         xp_widget.set_level(5)
         assert "5" in xp_widget.level_label.text()
         
+    def test_xp_gain_animates_bar_and_label(self, xp_widget):
+        """Test XP gain animates to the new value and updates the label"""
+        xp_widget.set_xp(10, 100)
+        xp_widget.add_xp(30)
+        assert xp_widget._xp_anim.state() == xp_widget._xp_anim.State.Running
+        
+        QTest.qWait(600)
+        assert xp_widget.xp_bar.value() == 40
+        assert xp_widget.xp_label.text() == "XP: 40 / 100"
+        
+    def test_level_titles(self, xp_widget):
+        """Test each level maps to the highest title reached"""
+        assert xp_widget.get_level_title(0) == "Student"
+        assert xp_widget.get_level_title(1) == "Novice Mathematician"
+        assert xp_widget.get_level_title(9) == "Problem Solver"
+        assert xp_widget.get_level_title(10) == "Equation Expert"
+        assert xp_widget.get_level_title(99) == "Grand Mathematician"
+        
     def test_level_up_animation(self, xp_widget):
         """Test level up triggers animation"""
         # Set initial XP close to level up
@@ -193,6 +315,19 @@ class TestXPSystem:
             QTest.qWait(600)
             mock_anim.assert_called_once()
             
+    def test_level_up_flash_reuses_effect(self, xp_widget):
+        """Test repeated level-ups reuse one effect that idles disabled"""
+        effect = xp_widget.level_label.graphicsEffect()
+        assert not effect.isEnabled()
+        
+        xp_widget.play_level_up_animation()
+        xp_widget.play_level_up_animation()
+        assert xp_widget.level_label.graphicsEffect() is effect
+        assert effect.isEnabled()
+        
+        QTest.qWait(1100)
+        assert not effect.isEnabled()
+            
     def test_streak_display(self, xp_widget):
         """Test streak counter"""
         xp_widget.set_streak(7)
@@ -219,9 +354,35 @@ class TestADHDOptimizations:
         with patch.object(manager, 'suggest_break') as mock_break:
             # Simulate reaching 25 minutes
             manager.session_time = 25 * 60 - 1  # One second before break
-            manager.check_session_time()  # This increments to exactly 25 minutes
+            manager.check_session_time()
+            mock_break.assert_not_called()
+            
+            manager.session_time = 25 * 60
+            manager.check_session_time()
             mock_break.assert_called_once()
             
+            # Next reminder is one interval later
+            assert manager.session_timer.remainingTime() > 24 * 60 * 1000
+            
+    def test_break_timer_fires_without_polling(self):
+        """Test the break reminder arrives from one timer, excluding paused time"""
+        from src.ui.session_manager import SessionManager
+        manager = SessionManager(break_interval=1)
+        suggested = []
+        manager.break_suggested.connect(lambda: suggested.append(manager.session_time))
+        
+        manager.start_session()
+        manager.session_time = 59
+        manager.pause_session()
+        QTest.qWait(1200)
+        assert suggested == []
+        assert manager.session_time == 59
+        
+        manager.resume_session()
+        QTest.qWait(1200)
+        assert suggested == [60]
+        manager.end_session()
+            
     def test_distraction_free_mode(self):
         """Test focus mode hides all non-essential UI"""
         from src.ui.main_window import FocusQuestWindow
@@ -255,13 +416,13 @@ class TestADHDOptimizations:
         
         # Clicking checkbox should give immediate visual feedback
         checkbox = widget.step_widgets[0].checkbox
-        initial_style = widget.step_widgets[0].styleSheet()
+        assert not widget.step_widgets[0].property("completed")
         
         # Check the checkbox
         checkbox.setChecked(True)
         
-        # Should have visual feedback (style change)
-        assert widget.step_widgets[0].styleSheet() != initial_style
+        # Should have visual feedback (themed completed state)
+        assert widget.step_widgets[0].property("completed") is True
             
     def test_clear_visual_hierarchy(self):
         """Test UI elements have clear importance"""
@@ -5,7 +5,7 @@ import json
 from pathlib import Path
 from unittest.mock import Mock, patch, MagicMock
 from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import QTimer
+from PyQt6.QtCore import QTimer, QSettings
 from PyQt6.QtTest import QTest
 
 # Ensure QApplication exists
@@ -21,14 +21,19 @@ class TestGUIFileWatcherIntegration:
     """Test integration between GUI and file watcher system."""
     
     @pytest.fixture
-    def integrated_window(self, qtbot):
+    def integrated_window(self, qtbot, tmp_path):
         """Create integrated window for testing."""
-        with patch('src.ui.main_window_integrated.DatabaseManager'):
-            with patch('src.ui.file_watcher_integration.EnhancedFileWatcher'):
-                with patch('src.ui.file_watcher_integration.QueueProcessor'):
-                    window = FocusQuestIntegratedWindow()
-                    qtbot.addWidget(window)
-                    return window
+        # Keep the first-run flag out of the real user config
+        QSettings.setPath(QSettings.Format.NativeFormat, QSettings.Scope.UserScope, str(tmp_path))
+        with patch.object(FocusQuestIntegratedWindow, '_show_initial_hint'):
+            with patch('src.ui.main_window_integrated.DatabaseManager'):
+                with patch('src.ui.file_watcher_integration.EnhancedFileWatcher'):
+                    with patch('src.ui.file_watcher_integration.QueueProcessor'):
+                        window = FocusQuestIntegratedWindow()
+                        qtbot.addWidget(window)
+                        # The deferred hint fires after construction
+                        QApplication.processEvents()
+        return window
     
     @pytest.fixture
     def file_watcher_integration(self):
@@ -44,6 +49,20 @@ class TestGUIFileWatcherIntegration:
         assert hasattr(integrated_window, 'file_watcher')
         assert integrated_window.file_watcher is not None
         
+    def test_inbox_hint_only_shown_on_first_run(self, integrated_window):
+        """Test that the welcome hint is remembered once shown."""
+        settings = Mock()
+        with patch('src.ui.main_window_integrated.QSettings', return_value=settings):
+            with patch('src.ui.main_window_integrated.QMessageBox') as mock_box:
+                settings.value.return_value = False
+                integrated_window._show_initial_hint()
+                mock_box.information.assert_called_once()
+                settings.setValue.assert_called_with("inbox_hint_shown", True)
+
+                settings.value.return_value = True
+                integrated_window._show_initial_hint()
+                mock_box.information.assert_called_once()
+
     def test_new_problem_from_file_updates_queue(self, integrated_window):
         """Test that new problems from files are added to queue."""
         # Set a current problem so new problem goes to queue instead of loading immediately
@@ -66,6 +85,24 @@ class TestGUIFileWatcherIntegration:
         assert len(integrated_window.problem_queue) == initial_queue_size + 1
         assert integrated_window.problem_queue[0]['id'] == 'problem_123'
         
+        # Normalized to the widget's keys on arrival
+        assert integrated_window.problem_queue[0]['original_text'] == 'Test problem'
+        assert integrated_window.problem_queue[0]['difficulty'] == 3
+        
+    def test_new_problem_signal_is_delivered_queued(self, integrated_window):
+        """Test that the watcher's emit returns before the UI slot runs."""
+        integrated_window.current_problem = {'id': 'current_problem'}
+
+        integrated_window.file_watcher.new_problem_ready.emit({
+            'id': 'problem_456',
+            'source': 'file_watcher',
+            'problem_text': 'Queued problem'
+        })
+        assert len(integrated_window.problem_queue) == 0
+
+        QApplication.processEvents()
+        assert integrated_window.problem_queue[0]['id'] == 'problem_456'
+
     def test_window_title_updates_with_queue_status(self, integrated_window):
         """Test that window title shows queue status."""
         # Add problems to queue
@@ -80,6 +117,17 @@ class TestGUIFileWatcherIntegration:
         # Title should show queue count
         assert "3 problems ready" in integrated_window.windowTitle()
         
+    def test_queue_display_skips_unchanged_sizes(self, integrated_window):
+        """Test that repeated updates with the same sizes emit only once."""
+        emitted = []
+        integrated_window.queue_status_changed.connect(emitted.append)
+
+        integrated_window._update_queue_display(2)
+        integrated_window._update_queue_display(2)
+        integrated_window._update_queue_display(1)
+
+        assert emitted == [2, 1]
+
     def test_panic_mode_pauses_file_processing(self, integrated_window):
         """Test that panic mode pauses file processing."""
         # Mock file watcher pause
@@ -172,6 +220,80 @@ class TestGUIFileWatcherIntegration:
         # Queue should have remaining problems
         assert len(integrated_window.problem_queue) == 2
         
+    def test_queue_refills_from_database_in_batches(self, integrated_window, tmp_path):
+        """Test that an empty queue is topped up from the database in one batch."""
+        from datetime import datetime
+        from src.database.db_manager import DatabaseManager
+        from src.database.models import Problem, ProblemAttempt, User
+        
+        db_manager = DatabaseManager(str(tmp_path / "test.db"))
+        with db_manager.session_scope() as session:
+            user = User(username="tester")
+            session.add(user)
+            for i in range(4):
+                session.add(Problem(original_text=f"Problem {i}", difficulty=3, category="algebra"))
+            session.flush()
+            # Problem 2 is already solved and must not be queued
+            session.add(ProblemAttempt(
+                user_id=user.id, problem_id=2,
+                started_at=datetime.now(), completed=True
+            ))
+        integrated_window.db_manager = db_manager
+        integrated_window.load_problem = Mock()
+        
+        integrated_window._load_next_from_queue()
+        
+        # First problem loaded, the rest prefetched
+        loaded = integrated_window.load_problem.call_args[0][0]
+        assert loaded['id'] == 1
+        assert loaded['source'] == 'database'
+        assert [p['id'] for p in integrated_window.problem_queue] == [3, 4]
+
+    def test_database_problems_include_steps_and_hints(self, integrated_window, tmp_path):
+        """Test that refilled problems carry their steps and per-step hints."""
+        from src.database.db_manager import DatabaseManager
+        from src.database.models import Problem, ProblemStep, Hint
+
+        db_manager = DatabaseManager(str(tmp_path / "test.db"))
+        with db_manager.session_scope() as session:
+            problem = Problem(original_text="Solve x + 1 = 3", difficulty=2, category="algebra")
+            session.add(problem)
+            session.flush()
+            for number in (2, 1):
+                step = ProblemStep(
+                    problem_id=problem.id, step_number=number,
+                    description=f"Step {number}", time_estimate=number * 2
+                )
+                session.add(step)
+                session.flush()
+                session.add(Hint(step_id=step.id, level=1, content=f"Hint for {number}"))
+        integrated_window.db_manager = db_manager
+
+        integrated_window._refill_queue_from_database()
+
+        steps = integrated_window.problem_queue[0]['steps']
+        assert [s['content'] for s in steps] == ["Step 1", "Step 2"]
+        assert steps[1]['duration'] == 4
+        assert steps[0]['hints'] == [{'level': 1, 'content': "Hint for 1"}]
+
+    def test_dropped_pdf_emits_queue_size(self, qtbot, tmp_path):
+        """Test that queueing a dropped PDF announces the new queue size."""
+        from src.core.enhanced_file_watcher import EnhancedFileWatcher
+        inbox = tmp_path / "inbox"
+        watcher = EnhancedFileWatcher(
+            inbox_dir=str(inbox),
+            processed_dir=str(tmp_path / "processed"),
+            db_path=str(tmp_path / "queue.db")
+        )
+        with patch('src.ui.file_watcher_integration.EnhancedFileWatcher', return_value=watcher):
+            with patch('src.ui.file_watcher_integration.QueueProcessor'):
+                integration = FileWatcherIntegration(inbox_dir=str(inbox), db_manager=Mock())
+        
+        pdf_path = inbox / "homework.pdf"
+        pdf_path.write_bytes(b"%PDF-1.4")
+        with qtbot.waitSignal(integration.queue_size_changed, timeout=1000):
+            watcher.handler._queue_pdf(str(pdf_path))
+        
     def test_file_watcher_thread_safety(self, file_watcher_integration):
         """Test that file watcher runs in separate thread."""
         # Create mock watcher
@@ -203,7 +325,8 @@ class TestGUIFileWatcherIntegration:
         """Test that integration handles errors without crashing."""
         # Simulate file watcher error
         error_msg = "Test error"
-        integrated_window._on_watcher_error(error_msg)
+        with patch('src.ui.main_window_integrated.QMessageBox'):
+            integrated_window._on_watcher_error(error_msg)
         
         # Should not crash, should show notification
         # (notification tested separately)
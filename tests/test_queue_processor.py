@@ -94,6 +94,24 @@ class TestQueueProcessor:
         assert 'PDF processing failed' in status['error_message']
         assert status['attempts'] == 1
         
+    def test_queue_listeners_notified_on_add_and_failure(self, processor):
+        """Test that listeners hear about new items and failed processing"""
+        listener = Mock()
+        processor.add_queue_listener(listener)
+        
+        processor.add_pdf("/path/listen.pdf")
+        assert listener.call_count == 1
+        
+        # Duplicates don't change the queue
+        processor.add_pdf("/path/listen.pdf")
+        assert listener.call_count == 1
+        
+        mock_pdf_processor = Mock()
+        mock_pdf_processor.process_pdf.side_effect = Exception("PDF processing failed")
+        processor.pdf_processor = mock_pdf_processor
+        processor._process_next_item()
+        assert listener.call_count == 2
+        
     def test_concurrent_processing(self, processor):
         """Test concurrent processing with multiple workers"""
         processed_items = []
@@ -138,6 +138,19 @@ class TestStateSynchronizer:
         assert mock_db_session.end_time is not None
         assert mock_db_session.total_time_seconds >= 0
         
+    def test_finalize_ends_session_and_stops_auto_save(self, synchronizer, mock_db_manager):
+        """Test shutdown stops auto-save and ends the session."""
+        _, mock_session = mock_db_manager
+        synchronizer._current_session = Mock(id=1, start_time=datetime.now())
+        mock_db_session = Mock(start_time=datetime.now())
+        mock_session.query.return_value.get.return_value = mock_db_session
+        
+        synchronizer.finalize()
+        
+        assert not synchronizer.auto_save_timer.isActive()
+        assert mock_db_session.end_time is not None
+        assert synchronizer._current_session is None
+        
         # Should commit
         mock_session.commit.assert_called()
         